@@ -0,0 +1,48 @@
+"""
+Render time, peak allocation and page count of PDF reports by case count
+
+Compares the per-case table layout with large-report mode for synthetic
+subjects with 10, 100 and 1,000 court cases.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pdf_report
+"""
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import make_result
+from utils.pdf_generator import PDFGenerator
+
+CASE_COUNTS = (10, 100, 1000)
+# reportlab writes page objects uncompressed, so they can be counted directly
+PAGE_OBJECT = re.compile(rb"/Type /Page(?!s)")
+
+def render(generator: PDFGenerator, result, large_report: bool):
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        generator.generate_report(result, path, large_report=large_report)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(path, "rb") as f:
+            pages = len(PAGE_OBJECT.findall(f.read()))
+        return elapsed, peak, pages, os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+def main():
+    generator = PDFGenerator()
+    print(f"{'cases':>6} {'mode':<8} {'seconds':>8} {'peak MB':>8} {'pages':>6} {'KB':>7}")
+    for cases in CASE_COUNTS:
+        result = make_result(cases, profiles=10, seed=cases)
+        for label, large_report in (("classic", False), ("large", True)):
+            elapsed, peak, pages, size = render(generator, result, large_report)
+            print(f"{cases:>6} {label:<8} {elapsed:>8.3f} {peak / 2**20:>8.1f} {pages:>6} {size // 1024:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Round trips per job spent on progress updates, before and after atomic updates
+
+Replays the progress ticks a search job emits against MongoDB and counts the
+commands sent to the server with a pymongo command listener. The counts do
+not depend on the server: the legacy update is a read and a write per tick
+(20 per standard search, 28 per photo search), the atomic one a single
+findAndModify (10 and 14). tests/test_progress_round_trips.py asserts them
+against a recording collection; this script adds the timings.
+
+Usage (from the backend directory, against a disposable database):
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=bench python -m benchmarks.bench_progress_round_trips
+"""
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from utils.search_store import SearchStore
+
+# (stage, progress) ticks emitted by process_search
+STANDARD_TICKS: List[Tuple[str, int]] = [
+    ("court_cases", 10), ("court_cases", 100),
+    ("matrimonial_profiles", 10), ("matrimonial_profiles", 100),
+    ("dating_profiles", 10), ("dating_profiles", 100),
+    ("social_media", 10), ("social_media", 100),
+    ("risk_calculation", 50), ("risk_calculation", 100)
+]
+PHOTO_TICKS: List[Tuple[str, int]] = [
+    ("photo_analysis", 20), ("photo_analysis", 100),
+    ("reverse_image_search", 20), ("reverse_image_search", 100)
+] + STANDARD_TICKS
+
+class CommandCounter(monitoring.CommandListener):
+    """Count commands sent to the server"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name in ("find", "update", "findAndModify"):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def legacy_update_progress(collection, job_id: str, stage: str, progress: int):
+    """update_progress as it was before: read the whole job, write the whole progress"""
+    job = await collection.find_one({"id": job_id})
+    if job:
+        job["progress"]["stages"][stage] = progress
+        total_stages = len(job["progress"]["stages"])
+        job["progress"]["overall"] = sum(job["progress"]["stages"].values()) // total_stages
+        await collection.update_one({"id": job_id}, {"$set": {"progress": job["progress"]}})
+
+def new_job(result_size: int) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "status": "processing",
+        "progress": {"overall": 0, "stages": {stage: 0 for stage, _ in PHOTO_TICKS}},
+        # Stand-in for a job that carries a large document (e.g. a previous result)
+        "result": {"padding": "x" * result_size}
+    }
+
+async def run(collection, update, ticks: List[Tuple[str, int]], counter: CommandCounter,
+              jobs: int, result_size: int) -> Tuple[float, float]:
+    total_trips = 0
+    start = time.perf_counter()
+    for _ in range(jobs):
+        job = new_job(result_size)
+        await collection.insert_one(job)
+        counter.count = 0
+        for stage, progress in ticks:
+            await update(collection, job["id"], stage, progress)
+        total_trips += counter.count
+    elapsed = time.perf_counter() - start
+    return total_trips / jobs, elapsed * 1000 / (jobs * len(ticks))
+
+async def main():
+    os.environ.setdefault('DB_NAME', 'past_matters_bench')
+    import server
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[counter])
+    db = client[os.environ['DB_NAME']]
+    collection = db.bench_progress
+    await collection.drop()
+    server.search_store = SearchStore(db)
+
+    async def atomic_update(coll, job_id, stage, progress):
+        await server.update_progress(job_id, stage, progress)
+
+    # update_progress writes to the searches collection of the store
+    atomic_collection = db.searches
+
+    print(f"{'variant':<10} {'search':<11} {'result KB':>9} {'trips/job':>10} {'ms/tick':>8}")
+    for result_size in (0, 256 * 1024):
+        for label, ticks in (("standard", STANDARD_TICKS), ("photo_only", PHOTO_TICKS)):
+            trips, ms = await run(collection, legacy_update_progress, ticks, counter, 20, result_size)
+            print(f"{'before':<10} {label:<11} {result_size // 1024:>9} {trips:>10.1f} {ms:>8.2f}")
+            trips, ms = await run(atomic_collection, atomic_update, ticks, counter, 20, result_size)
+            print(f"{'after':<10} {label:<11} {result_size // 1024:>9} {trips:>10.1f} {ms:>8.2f}")
+
+    await collection.drop()
+    await atomic_collection.delete_many({"result.padding": {"$exists": True}})
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
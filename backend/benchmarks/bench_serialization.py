@@ -0,0 +1,45 @@
+"""
+Encode cost of search results by size
+
+Compares the previous response path (validating through the pydantic
+SearchResult model, then encoding with the stdlib like JSONResponse) with
+plain stdlib encoding and the orjson path API responses now take.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization
+"""
+import json
+import os
+import timeit
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from benchmarks.synthetic import make_result
+from server import SearchResult
+from utils.serialization import dumps
+
+SIZES = ((1, 3), (20, 10), (200, 50), (2000, 200))
+
+def stdlib(result):
+    return json.dumps(result, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def pydantic_then_stdlib(result):
+    return stdlib(SearchResult.model_validate(result).model_dump())
+
+def best_of(func, result, number: int) -> float:
+    return min(timeit.repeat(lambda: func(result), number=number, repeat=5)) / number
+
+def main():
+    print(f"{'cases':>6} {'profiles':>8} {'KB':>7} {'pydantic+json':>14} {'json':>10} {'fast':>10}")
+    for cases, profiles in SIZES:
+        result = make_result(cases, profiles, seed=cases)
+        size = len(dumps(result))
+        number = max(1, 2_000_000 // size)
+        timings = [best_of(func, result, number) for func in (pydantic_then_stdlib, stdlib, dumps)]
+        print(f"{cases:>6} {profiles:>8} {size // 1024:>7} " + " ".join(
+            f"{seconds * 1e6:>12.1f}us" if i == 0 else f"{seconds * 1e6:>8.1f}us" for i, seconds in enumerate(timings)
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Regression benchmarks for the functions on every job's path
+
+Times RiskCalculator.calculate_risk, RelationshipTimeline and
+PDFGenerator.generate_report on synthetic subjects from a handful to tens of
+thousands of cases and profiles, and measures each call's peak allocation
+with tracemalloc. Results are compared with benchmarks/baselines.json; the
+run fails when a benchmark is slower, or allocates more, than its baseline
+by more than the threshold.
+
+Times are stored relative to a fixed pure-Python reference workload timed in
+the same run, so a faster or slower machine moves both alike and baselines
+recorded on one machine can be checked on another. The ratio still shifts
+somewhat between CPUs and Python versions; re-record with --update when the
+reference machine changes.
+
+Usage (from the backend directory):
+    python -m benchmarks.suite [--only risk,timeline,report] [--time-threshold 0.25]
+                               [--memory-threshold 0.10] [--update]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.synthetic import make_court_cases, make_profiles, make_result
+from utils.pdf_generator import PDFGenerator
+from utils.risk_calculator import RiskCalculator
+from utils.timeline import RelationshipTimeline
+
+BASELINES = Path(__file__).parent / "baselines.json"
+
+# (cases, profiles) per subject
+RISK_SIZES = ((5, 3), (100, 50), (1000, 500), (20000, 10000))
+TIMELINE_SIZES = (10, 1000, 20000)
+REPORT_SIZES = (10, 100, 1000, 10000)
+
+# Peak allocations of small benchmarks are a few KB; ignore growth below this
+MEMORY_SLACK_KB = 16
+
+Benchmark = Tuple[str, str, Callable[[], Any]]
+
+def risk_benchmarks() -> List[Benchmark]:
+    calculator = RiskCalculator()
+    benchmarks = []
+    for cases, profiles in RISK_SIZES:
+        court_cases = make_court_cases(cases, seed=cases)
+        social_profiles = make_profiles(profiles, seed=profiles)
+        benchmarks.append((
+            "risk", f"risk/{cases}x{profiles}",
+            lambda c=court_cases, p=social_profiles: calculator.calculate_risk(c, p)
+        ))
+    return benchmarks
+
+def timeline_benchmarks() -> List[Benchmark]:
+    benchmarks = []
+    for profiles in TIMELINE_SIZES:
+        social_profiles = make_profiles(profiles, seed=profiles, max_changes=6)
+        benchmarks.append((
+            "timeline", f"timeline/{profiles}",
+            lambda p=social_profiles: RelationshipTimeline(p).to_list()
+        ))
+    return benchmarks
+
+def report_benchmarks(output_dir: str) -> List[Benchmark]:
+    generator = PDFGenerator()
+    path = os.path.join(output_dir, "report.pdf")
+    benchmarks = []
+    for cases in REPORT_SIZES:
+        result = make_result(cases, profiles=10, seed=cases)
+        benchmarks.append((
+            "report", f"report/{cases}",
+            lambda r=result: generator.generate_report(r, path)
+        ))
+    return benchmarks
+
+def reference_workload() -> int:
+    """Fixed interpreter-bound work the benchmark times are expressed in"""
+    records = [{"id": i, "score": i * 7919 % 1000, "name": f"subject-{i}"} for i in range(2000)]
+    records.sort(key=lambda r: (r["score"], r["name"]))
+    return sum(len(r["name"]) for r in records if r["score"] > 500)
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Best per-call time over repeat runs"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Best per-call time over repeat runs, and the peak allocation of one call"""
+    seconds = best_time(func, repeat)
+
+    # Traced separately; tracemalloc would inflate the timings
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "peak_kb": round(peak / 1024, 1)}
+
+def compare(name: str, current: Dict[str, float], baseline: Dict[str, float],
+            time_threshold: float, memory_threshold: float) -> List[str]:
+    """Regressions of one benchmark against its baseline; times are compared as reference ratios"""
+    regressions = []
+    if current["ratio"] > baseline["ratio"] * (1 + time_threshold):
+        regressions.append(f"{name}: {current['ratio']:.4g}x reference vs baseline "
+                           f"{baseline['ratio']:.4g}x")
+    if current["peak_kb"] > baseline["peak_kb"] * (1 + memory_threshold) + MEMORY_SLACK_KB:
+        regressions.append(f"{name}: peak {current['peak_kb']:.1f}KB vs baseline {baseline['peak_kb']:.1f}KB")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the regression benchmarks")
+    parser.add_argument("--only", help="Comma-separated groups to run: risk, timeline, report")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per benchmark")
+    parser.add_argument("--time-threshold", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.10,
+                        help="Allowed peak allocation growth over the baseline")
+    parser.add_argument("--update", action="store_true", help="Record the results as the new baselines")
+    args = parser.parse_args()
+
+    groups = set(args.only.split(",")) if args.only else {"risk", "timeline", "report"}
+    stored = json.loads(BASELINES.read_text()) if BASELINES.exists() else {"benchmarks": {}}
+    baselines: Dict[str, Dict[str, float]] = stored["benchmarks"]
+
+    # Timed before and after the benchmarks, with more repeats; every ratio depends on it
+    reference = best_time(reference_workload, args.repeat * 3)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        benchmarks = [
+            benchmark
+            for benchmark in risk_benchmarks() + timeline_benchmarks() + report_benchmarks(output_dir)
+            if benchmark[0] in groups
+        ]
+        results: Dict[str, Dict[str, float]] = {
+            name: measure(func, args.repeat) for _, name, func in benchmarks
+        }
+
+    reference = min(reference, best_time(reference_workload, args.repeat * 3))
+    print(f"Reference workload: {reference * 1000:.3f}ms")
+    print(f"{'benchmark':<22} {'ms':>10} {'x ref':>10} {'baseline':>10} {'peak KB':>10} {'baseline':>10}")
+    regressions: List[str] = []
+    for name, current in results.items():
+        current["ratio"] = current["seconds"] / reference
+        baseline = baselines.get(name)
+        print(f"{name:<22} {current['seconds'] * 1000:>10.3f} {current['ratio']:>10.4g} "
+              f"{baseline['ratio'] if baseline else float('nan'):>10.4g} "
+              f"{current['peak_kb']:>10.1f} {baseline['peak_kb'] if baseline else float('nan'):>10.1f}")
+        if baseline and not args.update:
+            regressions.extend(compare(name, current, baseline, args.time_threshold, args.memory_threshold))
+
+    if args.update:
+        baselines.update({
+            name: {"ratio": float(f"{result['ratio']:.4g}"), "peak_kb": result["peak_kb"]}
+            for name, result in results.items()
+        })
+        stored = {
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "reference_seconds": round(reference, 7),
+            "benchmarks": dict(sorted(baselines.items()))
+        }
+        BASELINES.write_text(json.dumps(stored, indent=2) + "\n")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    missing = [name for name in results if name not in baselines]
+    if missing:
+        print(f"No baseline for {', '.join(missing)}; record one with --update")
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
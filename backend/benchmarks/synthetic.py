@@ -0,0 +1,82 @@
+"""Seeded generators of synthetic search data for benchmarks"""
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+CASE_TYPES = ["Civil", "Criminal", "Matrimonial", "Property Dispute", "Domestic Violence"]
+CASE_STATUSES = ["Pending", "Disposed", "Under Trial", "Judgment Reserved"]
+PLATFORMS = [
+    "Shaadi", "Bharatmatrimony", "Jeevansathi",
+    "Tinder", "Bumble", "Hinge", "TrulyMadly", "QuackQuack",
+    "Facebook", "Instagram", "Linkedin"
+]
+RELATIONSHIP_STATUSES = ["Single", "Divorced", "Separated", "Never Married", "In a relationship", "Married"]
+
+def _random_date(rng: random.Random, max_days: int) -> str:
+    return (date(2025, 1, 1) - timedelta(days=rng.randint(1, max_days))).strftime("%Y-%m-%d")
+
+def make_court_cases(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    cases = []
+    for i in range(count):
+        case_type = rng.choice(CASE_TYPES)
+        state = rng.choice(["Delhi", "Maharashtra", "Karnataka", "Tamil Nadu"])
+        cases.append({
+            "case_number": f"CC/{i}/{rng.randint(2015, 2024)}",
+            "case_type": case_type,
+            "filing_date": _random_date(rng, 3650),
+            "status": rng.choice(CASE_STATUSES),
+            "court_name": f"{state} District Court",
+            "state": state,
+            "severity_score": rng.randint(1, 10),
+            "summary": f"{case_type} case number {i}."
+        })
+    return cases
+
+def make_profiles(count: int, seed: int = 0, max_changes: int = 4) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        platform = rng.choice(PLATFORMS)
+        profiles.append({
+            "platform": platform,
+            "profile_url": f"https://www.{platform.lower()}.com/profile/{i}",
+            "created_date": _random_date(rng, 2555),
+            "relationship_status_history": [
+                {
+                    "date": _random_date(rng, 730),
+                    "previous_status": rng.choice(RELATIONSHIP_STATUSES),
+                    "new_status": rng.choice(RELATIONSHIP_STATUSES)
+                }
+                for _ in range(rng.randint(0, max_changes))
+            ],
+            "activity_pattern": {
+                "last_active": _random_date(rng, 60),
+                "profile_changes": rng.randint(0, 10)
+            }
+        })
+    return profiles
+
+def make_result(cases: int, profiles: int, seed: int = 0) -> Dict[str, Any]:
+    """Build a stored-result shaped document with the given number of cases and profiles"""
+    from utils.risk_calculator import RiskCalculator
+
+    court_cases = make_court_cases(cases, seed)
+    social_profiles = make_profiles(profiles, seed)
+    timeline = sorted(
+        (
+            {**change, "platform": profile["platform"]}
+            for profile in social_profiles
+            for change in profile["relationship_status_history"]
+        ),
+        key=lambda event: event["date"],
+        reverse=True
+    )
+    return {
+        "subject": {"name": "Synthetic Subject", "dob": "1990-01-01", "photo_matched": False, "photo_info": None},
+        "risk_score": RiskCalculator().calculate_risk(court_cases, social_profiles),
+        "court_cases": court_cases,
+        "social_profiles": social_profiles,
+        "relationship_timeline": timeline,
+        "generated_at": "2025-01-01T00:00:00+00:00"
+    }
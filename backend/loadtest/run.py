@@ -0,0 +1,232 @@
+"""
+End-to-end load test of the search API with offline sources
+
+Runs the API in process against the MongoDB at MONGO_URL (a throwaway
+database is created and dropped), with the scrapers and photo analysis
+replaced by the seeded stand-ins in loadtest.sources. Virtual users submit
+searches, poll their status and fetch the result; the run reports jobs/sec,
+p50/p95/p99 per endpoint and per pipeline stage, and peak RSS.
+
+Usage (from the backend directory):
+    python -m loadtest.run [--jobs N] [--concurrency N] [--photo-ratio R]
+                           [--time-scale S] [--latency court=lognormal:2:0.5]
+                           [--json report.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+ENDPOINTS = ("POST /api/search", "GET /api/search/{id}/status", "GET /api/search/{id}/result")
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of unsorted values"""
+    ordered = sorted(values)
+    rank = max(int(len(ordered) * p / 100 + 0.999999) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1)
+    }
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def make_photos(count: int, seed: int) -> List[bytes]:
+    """Distinct, seeded JPEGs for photo searches"""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    photos = []
+    for _ in range(count):
+        image = Image.frombytes("RGB", (256, 256), rng.randbytes(256 * 256 * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        photos.append(buffer.getvalue())
+    return photos
+
+class LoadTest:
+    """Drive a request mix through the API and collect latencies"""
+
+    def __init__(self, client, store, jobs: int, concurrency: int, photo_ratio: float,
+                 subjects: int, photos: List[bytes], seed: int, poll_interval: float,
+                 retry_delay: float):
+        self.client = client
+        self.store = store
+        self.jobs = jobs
+        self.concurrency = concurrency
+        self.photo_ratio = photo_ratio
+        self.subjects = subjects
+        self.photos = photos
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.rng = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.job_seconds: List[float] = []
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.rejected = 0
+
+    def _requests(self):
+        """The request mix, fixed up front so it only depends on the seed"""
+        for n in range(self.jobs):
+            subject = self.rng.randrange(self.subjects)
+            if self.rng.random() < self.photo_ratio:
+                yield {"photo": self.photos[subject % len(self.photos)]}
+            else:
+                yield {"name": f"Load Subject {subject}", "dob": "1990-01-01",
+                       "state": self.rng.choice(["Delhi", "Maharashtra", "Karnataka"])}
+
+    async def _timed(self, endpoint: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        return response
+
+    async def _search(self, request: Dict[str, Any]):
+        started = time.perf_counter()
+        files = {"photo": ("photo.jpg", request["photo"], "image/jpeg")} if "photo" in request else None
+        data = {key: value for key, value in request.items() if key != "photo"}
+        while True:
+            response = await self._timed(ENDPOINTS[0], "POST", "/api/search", data=data, files=files)
+            if response.status_code != 429:
+                break
+            self.rejected += 1
+            await asyncio.sleep(self.retry_delay)
+        if response.status_code != 200:
+            self.outcomes[f"http_{response.status_code}"] += 1
+            return
+        job_id = response.json()["job_id"]
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            status = (await self._timed(ENDPOINTS[1], "GET", f"/api/search/{job_id}/status")).json()
+            if status["status"] in ("completed", "failed"):
+                break
+        self.job_seconds.append(time.perf_counter() - started)
+        self.outcomes[status["status"]] += 1
+        if status["status"] != "completed":
+            return
+
+        await self._timed(ENDPOINTS[2], "GET", f"/api/search/{job_id}/result")
+        job = await self.store.get_job(job_id, {"pipeline": 1})
+        for stage, timing in ((job or {}).get("pipeline") or {}).get("stages", {}).items():
+            self.stages[stage].append(timing["duration_ms"] / 1000)
+
+    async def run(self) -> float:
+        """Run all jobs with at most `concurrency` users in flight; returns the wall time"""
+        requests = list(self._requests())
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def user(request):
+            async with semaphore:
+                await self._search(request)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(request) for request in requests))
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        completed = self.outcomes.get("completed", 0)
+        return {
+            "jobs": self.jobs,
+            "outcomes": dict(self.outcomes),
+            "rejected_429": self.rejected,
+            "elapsed_s": round(elapsed, 2),
+            "jobs_per_sec": round(completed / elapsed, 3) if elapsed else 0.0,
+            "job_latency": summarize(self.job_seconds) if self.job_seconds else None,
+            "endpoints": {name: summarize(self.latencies[name]) for name in ENDPOINTS if self.latencies[name]},
+            "stages": {name: summarize(values) for name, values in self.stages.items()},
+            "peak_rss_mb": peak_rss_mb()
+        }
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['jobs']} jobs in {report['elapsed_s']}s: {report['jobs_per_sec']} jobs/sec, "
+          f"outcomes {report['outcomes']}, {report['rejected_429']} rejected with 429, "
+          f"peak RSS {report['peak_rss_mb']} MB")
+    rows = [("job (submit to done)", report["job_latency"])] if report["job_latency"] else []
+    rows += [(name, stats) for name, stats in report["endpoints"].items()]
+    rows += [(f"stage {name}", stats) for name, stats in report["stages"].items()]
+    print(f"{'':<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in rows:
+        print(f"{name:<32} {stats['count']:>6} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the search API with offline sources")
+    parser.add_argument("--jobs", type=int, default=40, help="Searches to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Virtual users")
+    parser.add_argument("--photo-ratio", type=float, default=0.25, help="Share of photo_only searches")
+    parser.add_argument("--subjects", type=int, help="Distinct subjects (default: one per job)")
+    parser.add_argument("--photos", type=int, default=8, help="Distinct photos")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Factor applied to source latencies")
+    parser.add_argument("--latency", action="append", default=[], metavar="SOURCE=SPEC",
+                        help="Source latency, e.g. court=lognormal:2:0.5, dating=fixed:3, social=uniform:1:4")
+    parser.add_argument("--workers", type=int, help="Queue workers (SEARCH_WORKERS)")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between status polls")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="Seconds before retrying a 429")
+    parser.add_argument("--keep-db", action="store_true", help="Keep the load test database")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported; a .env file does not override these
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = f"past_matters_loadtest_{os.getpid()}"
+    os.environ["PHOTO_UPLOAD_DIR"] = tempfile.mkdtemp(prefix="past_matters_loadtest_")
+    os.environ.setdefault("SEARCH_QUEUE_POLL_SECONDS", "0.2")
+    if args.workers:
+        os.environ["SEARCH_WORKERS"] = str(args.workers)
+
+    import httpx
+    import server
+    from loadtest.sources import stand_in_sources
+
+    latencies = dict(spec.split("=", 1) for spec in args.latency)
+    server.source_factory = stand_in_sources(args.seed, latencies, args.time_scale)
+
+    # Only what the search pipeline needs; browsers and render pools stay off
+    await server.search_store.ensure_indexes()
+    await server.source_cache.ensure_indexes()
+    await server.progress_bus.start()
+    await server.search_queue.start()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            load_test = LoadTest(
+                client, server.search_store, args.jobs, args.concurrency, args.photo_ratio,
+                args.subjects or args.jobs, make_photos(args.photos, args.seed), args.seed,
+                args.poll_interval, args.retry_delay
+            )
+            elapsed = await load_test.run()
+    finally:
+        await server.search_queue.stop()
+        await server.progress_bus.stop()
+        if not args.keep_db:
+            await server.client.drop_database(os.environ["DB_NAME"])
+        server.client.close()
+        shutil.rmtree(os.environ["PHOTO_UPLOAD_DIR"], ignore_errors=True)
+
+    report = load_test.report(elapsed)
+    report["config"] = {key: value for key, value in vars(args).items() if key != "json"}
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+"""
+Deterministic offline stand-ins for the search sources
+
+Every stand-in derives its records and its latency from the seed, its own
+name and the query, so the same query always gets the same answer after the
+same delay regardless of how jobs interleave. Latencies follow configurable
+distributions scaled by a common time scale.
+"""
+import asyncio
+import math
+import random
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+from benchmarks.synthetic import make_court_cases, make_profiles
+
+# Roughly what the real sources take, in seconds
+DEFAULT_LATENCIES = {
+    "photo_analyzer": "lognormal:0.15:0.3",
+    "image_search": "lognormal:3:0.3",
+    "court": "lognormal:2:0.5",
+    "matrimonial": "lognormal:6:0.3",
+    "dating": "fixed:3",
+    "social": "lognormal:6:0.3"
+}
+
+MATRIMONIAL_SITES = ["Shaadi", "Bharatmatrimony", "Jeevansathi"]
+DATING_APPS = ["Tinder", "Bumble", "Hinge", "TrulyMadly", "QuackQuack"]
+SOCIAL_PLATFORMS = ["Facebook", "Instagram", "Linkedin"]
+
+class Latency:
+    """
+    A latency distribution in seconds
+
+    Specs are `fixed:SECONDS`, `uniform:LOW:HIGH` or `lognormal:MEDIAN:SIGMA`.
+    """
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution {kind}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, *params = spec.split(":")
+        try:
+            return cls(kind, *(float(param) for param in params))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid latency spec {spec!r}") from e
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma)
+
+    def __str__(self) -> str:
+        return ":".join([self.kind, *(f"{param:g}" for param in self.params)])
+
+class StandInSource:
+    """Base of the stand-ins: a seeded generator per query and a simulated delay"""
+
+    def __init__(self, name: str, latency: Latency, seed: int = 0, time_scale: float = 1.0):
+        self.name = name
+        self.latency = latency
+        self.seed = seed
+        self.time_scale = time_scale
+
+    def _rng(self, *query: Optional[str]) -> random.Random:
+        return random.Random(f"{self.seed}:{self.name}:{'|'.join(part or '' for part in query)}")
+
+    async def _wait(self, rng: random.Random):
+        await asyncio.sleep(self.latency.sample(rng) * self.time_scale)
+
+class StandInCourtScraper(StandInSource):
+    async def scrape(self, name: str, state: Optional[str] = None):
+        rng = self._rng(name, state)
+        await self._wait(rng)
+        return make_court_cases(rng.randint(0, 8), seed=rng.randrange(2**32))
+
+class StandInProfileScraper(StandInSource):
+    """Profiles on the given platforms, shaped like the scrapers' records"""
+
+    def __init__(self, name: str, latency: Latency, platforms: Iterable[str], seed: int = 0,
+                 time_scale: float = 1.0, max_profiles: int = 3):
+        super().__init__(name, latency, seed, time_scale)
+        self.platforms = list(platforms)
+        self.max_profiles = max_profiles
+
+    async def scrape(self, name: str, email: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [profile async for profile in self.stream(name, email)]
+
+    async def stream(self, name: str, email: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the profiles one at a time, spreading the latency between them"""
+        rng = self._rng(name, email)
+        delay = self.latency.sample(rng) * self.time_scale
+        profiles = make_profiles(rng.randint(0, self.max_profiles), seed=rng.randrange(2**32))
+        for i, profile in enumerate(profiles):
+            profile["platform"] = rng.choice(self.platforms)
+            profile["profile_url"] = f"https://www.{profile['platform'].lower()}.com/profile/{i}"
+        for profile in profiles:
+            await asyncio.sleep(delay / (len(profiles) + 1))
+            yield profile
+        await asyncio.sleep(delay / (len(profiles) + 1))
+
+class StandInImageSearch(StandInSource):
+    async def comprehensive_photo_search(self, image_path: str) -> Dict[str, Any]:
+        rng = self._rng(Path(image_path).stem)
+        await self._wait(rng)
+        social = [
+            {
+                "platform": platform,
+                "profile_url": f"Profile found on {platform}",
+                "match_confidence": rng.randint(75, 95),
+                "profile_name": f"Subject {rng.randrange(10000)}",
+                "photo_count": rng.randint(5, 50),
+                "last_updated": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            }
+            for platform in SOCIAL_PLATFORMS if rng.random() > 0.6
+        ]
+        dating = [
+            {
+                "platform": app,
+                "profile_url": f"Profile found on {app} (URL protected)",
+                "match_confidence": rng.randint(70, 90),
+                "profile_active": rng.random() > 0.5,
+                "photo_matches": rng.randint(1, 3),
+                "account_age_days": rng.randint(30, 730)
+            }
+            for app in DATING_APPS if rng.random() > 0.7
+        ]
+        return {
+            "google_images": [],
+            "social_media": social,
+            "dating_apps": dating,
+            "total_matches": len(social) + len(dating),
+            "high_confidence_matches": len([r for r in social + dating if r["match_confidence"] >= 85])
+        }
+
+class StandInPhotoAnalyzer(StandInSource):
+    async def analyze(self, image_path: str) -> Optional[Dict[str, Any]]:
+        rng = self._rng(Path(image_path).stem)
+        await self._wait(rng)
+        size = rng.randint(80, 400)
+        return {
+            "face_detected": True,
+            "face_count": rng.randint(1, 3),
+            "primary_face": {"x": rng.randint(0, 400), "y": rng.randint(0, 400),
+                             "width": size, "height": size, "confidence": 0.85},
+            "face_hash": f"{rng.getrandbits(64):016x}",
+            "full_image_hash": f"{rng.getrandbits(64):016x}"
+        }
+
+def stand_in_sources(seed: int = 0, latencies: Optional[Dict[str, str]] = None,
+                     time_scale: float = 1.0) -> Callable[[], Dict[str, Any]]:
+    """
+    Build a source factory for server.source_factory
+
+    Args:
+        seed: Seed of all generated records and latencies
+        latencies: Latency specs by source name, overriding DEFAULT_LATENCIES
+        time_scale: Factor applied to every sampled latency
+    """
+    specs = {**DEFAULT_LATENCIES, **(latencies or {})}
+    unknown = set(specs) - set(DEFAULT_LATENCIES)
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(sorted(unknown))}")
+    latency = {name: Latency.parse(spec) for name, spec in specs.items()}
+    sources = {
+        "photo_analyzer": StandInPhotoAnalyzer("photo_analyzer", latency["photo_analyzer"], seed, time_scale),
+        "image_search": StandInImageSearch("image_search", latency["image_search"], seed, time_scale),
+        "court": StandInCourtScraper("court", latency["court"], seed, time_scale),
+        "matrimonial": StandInProfileScraper("matrimonial", latency["matrimonial"], MATRIMONIAL_SITES,
+                                             seed, time_scale),
+        "dating": StandInProfileScraper("dating", latency["dating"], DATING_APPS, seed, time_scale),
+        "social": StandInProfileScraper("social", latency["social"], SOCIAL_PLATFORMS, seed, time_scale)
+    }
+    # Stand-ins keep no per-search state, so every search can share them
+    return lambda: sources
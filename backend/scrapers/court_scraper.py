@@ -1,16 +1,19 @@
 import asyncio
 import logging
 from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import Page
 import random
 from datetime import datetime, timedelta
+from utils.browser_pool import BrowserPool, browser_page
+from utils.metrics import SCRAPER_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
 class CourtScraper:
     """Scraper for court records from eCourts India and other sources"""
     
-    def __init__(self):
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        self.browser_pool = browser_pool
         self.ecourts_url = "https://ecourts.gov.in/ecourts_home/"
         self.timeout = 30000
     
@@ -28,21 +31,13 @@ class CourtScraper:
         try:
             logger.info(f"Starting court scrape for: {name}")
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                )
-                page = await context.new_page()
-                
+            async with timed(SCRAPER_SECONDS, scraper="court"), browser_page(self.browser_pool) as page:
                 cases = []
                 
                 # Try eCourts India
                 ecourts_cases = await self._scrape_ecourts(page, name, state)
                 cases.extend(ecourts_cases)
                 
-                await browser.close()
-                
                 logger.info(f"Found {len(cases)} court cases for {name}")
                 return cases
                 
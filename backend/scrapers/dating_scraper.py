@@ -1,8 +1,9 @@
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import random
 from datetime import datetime, timedelta
+from utils.metrics import SCRAPER_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
@@ -18,26 +19,29 @@ class DatingScraper:
         Note: Dating apps have strict privacy policies and don't allow public scraping
         This is for demonstration purposes with simulated data
         """
+        return [profile async for profile in self.stream(name, email)]
+    
+    async def stream(self, name: str, email: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield dating profiles as they are found"""
         try:
             logger.info(f"Starting dating profile search for: {name}")
             
-            profiles = []
+            found = 0
             
             # Dating apps don't allow public access
             # For MVP, we generate sample data to demonstrate the feature
-            await asyncio.sleep(3)  # Simulate scraping time
+            async with timed(SCRAPER_SECONDS, scraper="dating"):
+                await asyncio.sleep(3)  # Simulate scraping time
             
             for platform in self.platforms:
                 if random.random() > 0.7:  # 30% chance of finding profile
-                    profile = self._generate_sample_profile(platform, name)
-                    profiles.append(profile)
+                    yield self._generate_sample_profile(platform, name)
+                    found += 1
             
-            logger.info(f"Found {len(profiles)} dating profiles for {name}")
-            return profiles
+            logger.info(f"Found {found} dating profiles for {name}")
             
         except Exception as e:
             logger.error(f"Error in dating profile search: {str(e)}")
-            return []
     
     def _generate_sample_profile(self, platform: str, name: str) -> Dict[str, Any]:
         """Generate sample dating profile"""
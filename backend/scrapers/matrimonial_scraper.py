@@ -1,16 +1,19 @@
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Page
+from typing import AsyncIterator, List, Dict, Any, Optional
+from playwright.async_api import Page
 import random
 from datetime import datetime, timedelta
+from utils.browser_pool import BrowserPool, browser_page
+from utils.metrics import SCRAPER_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
 class MatrimonialScraper:
     """Scraper for matrimonial sites like Shaadi.com, BharatMatrimony, Jeevansathi"""
     
-    def __init__(self):
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        self.browser_pool = browser_pool
         self.sites = {
             "shaadi": "https://www.shaadi.com",
             "bharatmatrimony": "https://www.bharatmatrimony.com",
@@ -29,32 +32,28 @@ class MatrimonialScraper:
         Returns:
             List of matrimonial profile records
         """
+        return [profile async for profile in self.stream(name, email)]
+    
+    async def stream(self, name: str, email: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield matrimonial profiles as each site is scraped"""
         try:
             logger.info(f"Starting matrimonial scrape for: {name}")
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                )
-                page = await context.new_page()
-                
-                profiles = []
+            async with timed(SCRAPER_SECONDS, scraper="matrimonial"), browser_page(self.browser_pool) as page:
+                found = 0
                 
                 # Try each matrimonial site
                 for site_name, url in self.sites.items():
                     site_profiles = await self._scrape_site(page, site_name, url, name, email)
-                    profiles.extend(site_profiles)
+                    for profile in site_profiles:
+                        yield profile
+                    found += len(site_profiles)
                     await asyncio.sleep(2)  # Rate limiting
                 
-                await browser.close()
-                
-                logger.info(f"Found {len(profiles)} matrimonial profiles for {name}")
-                return profiles
+                logger.info(f"Found {found} matrimonial profiles for {name}")
                 
         except Exception as e:
             logger.error(f"Error in matrimonial scraping: {str(e)}")
-            return []
     
     async def _scrape_site(self, page: Page, site_name: str, url: str, 
                           name: str, email: Optional[str]) -> List[Dict[str, Any]]:
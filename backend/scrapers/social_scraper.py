@@ -1,16 +1,19 @@
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Page
+from typing import AsyncIterator, List, Dict, Any, Optional
+from playwright.async_api import Page
 import random
 from datetime import datetime, timedelta
+from utils.browser_pool import BrowserPool, browser_page
+from utils.metrics import SCRAPER_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
 class SocialScraper:
     """Scraper for social media platforms (Facebook, Instagram, LinkedIn)"""
     
-    def __init__(self):
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        self.browser_pool = browser_pool
         self.platforms = {
             "facebook": "https://www.facebook.com",
             "instagram": "https://www.instagram.com",
@@ -23,32 +26,28 @@ class SocialScraper:
         Scrape social media profiles
         Note: Most platforms restrict scraping and require authentication
         """
+        return [profile async for profile in self.stream(name, email)]
+    
+    async def stream(self, name: str, email: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield social media profiles as each platform is searched"""
         try:
             logger.info(f"Starting social media search for: {name}")
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                )
-                page = await context.new_page()
-                
-                profiles = []
+            async with timed(SCRAPER_SECONDS, scraper="social"), browser_page(self.browser_pool) as page:
+                found = 0
                 
                 # Try each social platform
                 for platform_name, url in self.platforms.items():
                     platform_profiles = await self._scrape_platform(page, platform_name, url, name)
-                    profiles.extend(platform_profiles)
+                    for profile in platform_profiles:
+                        yield profile
+                    found += len(platform_profiles)
                     await asyncio.sleep(2)
                 
-                await browser.close()
-                
-                logger.info(f"Found {len(profiles)} social media profiles for {name}")
-                return profiles
+                logger.info(f"Found {found} social media profiles for {name}")
                 
         except Exception as e:
             logger.error(f"Error in social media scraping: {str(e)}")
-            return []
     
     async def _scrape_platform(self, page: Page, platform: str, url: str, name: str) -> List[Dict[str, Any]]:
         """Scrape a specific social media platform"""
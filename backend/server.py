@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Request, Response, Header, Depends, Query
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -7,19 +7,37 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 import uuid
 from datetime import datetime, timezone
 import asyncio
 import base64
 import aiofiles
+import secrets
 from scrapers.court_scraper import CourtScraper
 from scrapers.matrimonial_scraper import MatrimonialScraper
 from scrapers.dating_scraper import DatingScraper
 from scrapers.social_scraper import SocialScraper
 from utils.risk_calculator import RiskCalculator
-from utils.photo_matcher import PhotoMatcher
 from utils.image_search import ReverseImageSearch
+from utils.job_queue import SearchJobQueue
+from utils.stage_graph import StageGraph
+from utils.browser_pool import BrowserPool
+from utils.progress_bus import ProgressBus, TERMINAL_STATUSES, status_event
+from utils.search_store import SearchStore
+from utils.result_cache import CachedResult, ResultCache, etag_matches, result_digest, serialize_result
+from utils.single_flight import SingleFlight, search_key
+from utils.source_cache import SourceCache
+from utils.sources import SearchContext, SearchSource, default_registry, photo_match_profile, until_deadline
+from utils.pdf_renderer import PDFRenderer
+from utils.zip_stream import ZipStreamWriter
+from utils.rescore import ResultRescorer
+from utils.timeline import RelationshipTimeline
+from utils.serialization import FastJSONResponse, dumps
+from utils.photo_store import PhotoStore, PhotoTooLarge
+from utils.image_preprocessor import ImagePreprocessor
+from utils import metrics
+from utils.job_profiler import JobProfiler
 
 
 ROOT_DIR = Path(__file__).parent
@@ -29,9 +47,16 @@ load_dotenv(ROOT_DIR / '.env')
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
+search_store = SearchStore.from_env(db)
+result_cache = ResultCache.from_env()
+pdf_renderer = PDFRenderer.from_env()
+result_rescorer = ResultRescorer.from_env(search_store)
+photo_store = PhotoStore.from_env(db.photos)
+image_preprocessor = ImagePreprocessor.from_env()
+job_profiler = JobProfiler.from_env(db.search_profiles)
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -57,6 +82,12 @@ class SearchJobResponse(BaseModel):
     estimated_time: int  # seconds
     status_url: str
 
+class BulkExportRequest(BaseModel):
+    job_ids: List[str]
+
+class RescoreRequest(BaseModel):
+    run_id: Optional[str] = None  # resume this run
+
 class ProgressInfo(BaseModel):
     overall: int
     stages: Dict[str, int]
@@ -95,6 +126,7 @@ class RiskScoreResult(BaseModel):
     breakdown: RiskScoreBreakdown
     contributing_factors: List[str]
     confidence_level: int
+    incomplete_sources: List[str] = []
 
 class SearchResult(BaseModel):
     subject: Dict[str, Any]
@@ -103,6 +135,7 @@ class SearchResult(BaseModel):
     social_profiles: List[SocialProfileRecord]
     relationship_timeline: List[Dict[str, Any]]
     generated_at: str
+    incomplete_sources: List[str] = []
 
 # In-memory job storage (in production, use Redis)
 jobs_store = {}
@@ -116,7 +149,9 @@ async def create_search(name: str = Form(None), dob: str = Form(None),
                        state: Optional[str] = Form(None),
                        email: Optional[str] = Form(None),
                        phone: Optional[str] = Form(None),
-                       photo: Optional[UploadFile] = File(None)):
+                       photo: Optional[UploadFile] = File(None),
+                       x_profile: Optional[str] = Header(None),
+                       x_admin_token: Optional[str] = Header(None)):
     try:
         # Validate: either (name AND dob) OR photo must be provided
         if not photo and (not name or not dob):
@@ -125,56 +160,68 @@ async def create_search(name: str = Form(None), dob: str = Form(None),
                 detail="Either provide both name and DOB, or upload a photo to search"
             )
         
+        # Profiling a search on request is an admin feature
+        profile = x_profile in ("1", "true")
+        if profile:
+            await require_admin(x_admin_token)
+        
+        # Admission control: reject instead of growing the backlog without bound
+        retry_after = await search_queue.admission_check()
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many searches in progress, please retry shortly",
+                headers={"Retry-After": str(retry_after)}
+            )
+        
         job_id = str(uuid.uuid4())
         
-        # Save photo if uploaded
+        # Save photo if uploaded; identical photos share one stored file
         photo_path = None
         if photo:
-            upload_dir = Path("/app/backend/uploads")
-            upload_dir.mkdir(exist_ok=True)
-            photo_path = upload_dir / f"{job_id}.jpg"
-            async with aiofiles.open(photo_path, 'wb') as f:
-                content = await photo.read()
-                await f.write(content)
+            try:
+                photo_path = (await photo_store.save(photo))["path"]
+            except PhotoTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
         
         # Determine search type
         search_type = "photo_only" if (photo and not name) else "standard"
         
         # Create search job
+        input_data = {
+            "name": name,
+            "dob": dob,
+            "state": state,
+            "email": email,
+            "phone": phone,
+            "photo_path": photo_path,
+            "search_type": search_type,
+            "profile": profile
+        }
         job_data = {
             "id": job_id,
-            "input": {
-                "name": name,
-                "dob": dob,
-                "state": state,
-                "email": email,
-                "phone": phone,
-                "photo_path": str(photo_path) if photo_path else None,
-                "search_type": search_type
-            },
+            "input": input_data,
             "status": "queued",
             "progress": {
                 "overall": 0,
                 "stages": {
-                    "photo_analysis": 0 if photo else 100,
-                    "reverse_image_search": 0 if search_type == "photo_only" else 100,
-                    "court_cases": 0,
-                    "matrimonial_profiles": 0,
-                    "dating_profiles": 0,
-                    "social_media": 0,
+                    **{source.name: 0 if source.enabled(input_data) else 100 for source in source_registry},
                     "risk_calculation": 0
                 }
             },
             "created_at": datetime.now(timezone.utc).isoformat(),
-            "result": None,
             "error": None
         }
         
-        # Store in MongoDB
-        await db.searches.insert_one(job_data)
-        
-        # Start background task
-        asyncio.create_task(process_search(job_id, job_data["input"]))
+        # Store in MongoDB; the job queue picks it up from there
+        try:
+            await search_store.create_job(job_data)
+        except Exception:
+            # No job references the photo, so drop this request's reference to it
+            if photo_path:
+                await photo_store.release(photo_path)
+            raise
+        search_queue.notify()
         
         return SearchJobResponse(
             job_id=job_id,
@@ -191,76 +238,258 @@ async def create_search(name: str = Form(None), dob: str = Form(None),
 @api_router.get("/search/{job_id}/status", response_model=SearchStatus)
 async def get_search_status(job_id: str):
     try:
-        job = await db.searches.find_one({"id": job_id}, {"_id": 0})
+        job = await search_store.get_status(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Search job not found")
         
-        result_url = f"/api/search/{job_id}/result" if job["status"] == "completed" else None
-        
-        return SearchStatus(
-            status=job["status"],
-            progress=ProgressInfo(
-                overall=job["progress"]["overall"],
-                stages=job["progress"]["stages"]
-            ),
-            result_url=result_url,
-            error=job.get("error")
-        )
+        # The status document is ours and already has the SearchStatus shape,
+        # so it is encoded directly rather than validated again
+        return Response(content=dumps(status_event(job_id, job)), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/search/{job_id}/result")
-async def get_search_result(job_id: str):
+# Seconds without a bus update before an event stream re-reads the job status
+SSE_POLL_SECONDS = float(os.environ.get('SSE_POLL_SECONDS', 15))
+
+@api_router.get("/search/{job_id}/events")
+async def stream_search_events(job_id: str):
+    """
+    Stream status updates as Server-Sent Events until the job finishes
+
+    Updates come from the progress bus. When none arrive for SSE_POLL_SECONDS
+    the stored status is read again, so the stream still ends for jobs run
+    by a process the bus doesn't reach (e.g. the in-process bus with several
+    server processes).
+    """
+    # Subscribe before reading the snapshot so no transition is missed in between
+    queue = progress_bus.subscribe(job_id)
     try:
-        job = await db.searches.find_one({"id": job_id}, {"_id": 0})
-        if not job:
-            raise HTTPException(status_code=404, detail="Search job not found")
-        
-        if job["status"] != "completed":
-            raise HTTPException(status_code=400, detail="Search not completed yet")
-        
-        if not job.get("result"):
-            raise HTTPException(status_code=404, detail="No results found")
-        
-        return JSONResponse(content=job["result"])
+        job = await search_store.get_status(job_id)
+    except Exception as e:
+        progress_bus.unsubscribe(job_id, queue)
+        logger.error(f"Error getting status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not job:
+        progress_bus.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Search job not found")
+    
+    async def event_stream():
+        try:
+            event = status_event(job_id, job)
+            yield f"data: {dumps(event).decode()}\n\n"
+            while event["status"] not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # The job may run in a process the bus doesn't reach; read its status instead
+                    current = await search_store.get_status(job_id)
+                    if not current:
+                        return
+                    polled = status_event(job_id, current)
+                    if polled == event:
+                        yield ": keep-alive\n\n"
+                        continue
+                    event = polled
+                yield f"data: {dumps(event).decode()}\n\n"
+        finally:
+            progress_bus.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def load_completed_result(job_id: str) -> Dict[str, Any]:
+    """Load the result of a completed job or raise the matching HTTP error"""
+    result = await search_store.get_result(job_id)
+    if result:
+        return result
+    await raise_missing_result(job_id)
+
+async def raise_missing_result(job_id: str):
+    """Raise the HTTP error explaining why a job has no result"""
+    job = await search_store.get_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Search job not found")
+    
+    if job["status"] != "completed":
+        raise HTTPException(status_code=400, detail="Search not completed yet")
+    
+    raise HTTPException(status_code=404, detail="No results found")
+
+async def get_cached_result(job_id: str) -> CachedResult:
+    """Get a completed result from the cache, loading it from MongoDB on a miss"""
+    cached = result_cache.get(job_id)
+    if cached is None:
+        cached = result_cache.put(job_id, await load_completed_result(job_id))
+    return cached
+
+# Top-level result fields that can be requested with fields=
+RESULT_FIELDS = ("subject", "risk_score", "court_cases", "social_profiles", "relationship_timeline", "generated_at",
+                 "incomplete_sources")
+
+# Result arrays that can be paged through
+PAGED_SECTIONS = ("court_cases", "social_profiles", "relationship_timeline")
+
+def encode_offset_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        kind, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        if kind != "o" or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+
+@api_router.get("/search/{job_id}/result", response_model=SearchResult)
+async def get_search_result(job_id: str, request: Request, fields: Optional[str] = None):
+    """
+    Get a completed result
+
+    fields= (comma separated top-level fields) returns only those fields; the
+    projection runs in MongoDB unless the result is already cached.
+    """
+    try:
+        if fields:
+            requested = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = [field for field in requested if field not in RESULT_FIELDS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown result fields: {', '.join(unknown)}")
+            cached = result_cache.get(job_id)
+            if cached is not None:
+                projected = {field: cached.result[field] for field in requested if field in cached.result}
+            else:
+                projected = await search_store.get_result_fields(job_id, requested)
+            if projected is None:
+                await raise_missing_result(job_id)
+            return Response(content=serialize_result(projected), media_type="application/json",
+                            headers={"Cache-Control": "private, no-cache"})
+        
+        cached = await get_cached_result(job_id)
+        headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting result: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/search/{job_id}/result/{section}")
+async def get_search_result_section(job_id: str, section: str, cursor: Optional[str] = None,
+                                    limit: int = Query(50, ge=1, le=500), format: str = "json"):
+    """
+    Page through one of the result's arrays
+
+    format=ndjson streams every item from the cursor on, one JSON document
+    per line, reading the array from MongoDB limit items at a time.
+    """
+    try:
+        if section not in PAGED_SECTIONS:
+            raise HTTPException(status_code=404, detail="Unknown result section")
+        if format not in ("json", "ndjson"):
+            raise HTTPException(status_code=400, detail="Unsupported format")
+        offset = decode_offset_cursor(cursor)
+        
+        cached = result_cache.get(job_id)
+        
+        async def read_slice(skip: int, count: int) -> Optional[List[Any]]:
+            if cached is not None:
+                return cached.result.get(section, [])[skip:skip + count]
+            return await search_store.get_result_slice(job_id, section, skip, count)
+        
+        # One extra item tells whether there is a next page
+        items = await read_slice(offset, limit + 1)
+        if items is None:
+            await raise_missing_result(job_id)
+        
+        if format == "ndjson":
+            async def lines():
+                batch, skip = items, offset
+                while batch:
+                    for item in batch[:limit]:
+                        yield serialize_result(item) + b"\n"
+                    if len(batch) <= limit:
+                        break
+                    skip += limit
+                    batch = await read_slice(skip, limit + 1) or []
+            
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+        
+        next_cursor = encode_offset_cursor(offset + limit) if len(items) > limit else None
+        return Response(
+            content=serialize_result({"items": items[:limit], "next_cursor": next_cursor}),
+            media_type="application/json",
+            headers={"Cache-Control": "private, no-cache"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting result section: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/search/{job_id}/timeline")
+async def get_search_timeline(job_id: str, cursor: Optional[str] = None,
+                              limit: int = Query(50, ge=1, le=500)):
+    """
+    Page through the relationship timeline, newest first
+
+    The timeline index is kept with the cached result; for results that
+    aren't cached it is built from the profiles alone and cached on its own.
+    """
+    try:
+        cached = result_cache.get(job_id)
+        if cached is not None:
+            if cached.timeline is None:
+                cached.timeline = RelationshipTimeline(cached.result.get("social_profiles", []))
+            timeline = cached.timeline
+        else:
+            timeline = result_cache.get_timeline(job_id)
+            if timeline is None:
+                projected = await search_store.get_result_fields(job_id, ["social_profiles"])
+                if projected is None:
+                    await raise_missing_result(job_id)
+                timeline = result_cache.put_timeline(
+                    job_id, RelationshipTimeline(projected.get("social_profiles", []))
+                )
+        try:
+            events, next_cursor = timeline.page(cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"events": events, "next_cursor": next_cursor, "total": len(timeline)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting timeline: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.get("/search/{job_id}/export/pdf")
-async def export_result_pdf(job_id: str):
+async def export_result_pdf(job_id: str, request: Request):
     """Export search result as PDF"""
     try:
-        from utils.pdf_generator import PDFGenerator
-        from fastapi.responses import FileResponse
-        
-        job = await db.searches.find_one({"id": job_id}, {"_id": 0})
-        if not job:
-            raise HTTPException(status_code=404, detail="Search job not found")
-        
-        if job["status"] != "completed":
-            raise HTTPException(status_code=400, detail="Search not completed yet")
-        
-        if not job.get("result"):
-            raise HTTPException(status_code=404, detail="No results found")
-        
-        # Generate PDF
-        pdf_generator = PDFGenerator()
-        pdf_dir = Path("/app/backend/exports")
-        pdf_dir.mkdir(exist_ok=True)
-        pdf_path = pdf_dir / f"report_{job_id}.pdf"
+        cached = await get_cached_result(job_id)
+        result = cached.result
         
-        pdf_generator.generate_report(job["result"], str(pdf_path))
+        # Rendered in the PDF worker pool and cached on disk by result content
+        pdf_path = await pdf_renderer.render(result, cached.digest)
+        etag = f'"{pdf_path.stem.removeprefix("report_")[:32]}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
         return FileResponse(
             path=str(pdf_path),
             media_type="application/pdf",
-            filename=f"past_matters_report_{job['result']['subject']['name'].replace(' ', '_')}.pdf"
+            filename=f"past_matters_report_{result['subject']['name'].replace(' ', '_')}.pdf",
+            headers={"ETag": etag}
         )
     except HTTPException:
         raise
@@ -268,187 +497,395 @@ async def export_result_pdf(job_id: str):
         logger.error(f"Error exporting PDF: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_search(job_id: str, input_data: Dict[str, Any]):
-    """Background task to process search"""
+MAX_BULK_EXPORT = int(os.environ.get('MAX_BULK_EXPORT', 100))
+
+@api_router.post("/search/export/zip")
+async def export_results_zip(request: BulkExportRequest):
+    """Export the PDF reports of several completed searches as one streamed ZIP archive"""
+    job_ids = list(dict.fromkeys(request.job_ids))
+    if not job_ids:
+        raise HTTPException(status_code=400, detail="Provide at least one job id")
+    if len(job_ids) > MAX_BULK_EXPORT:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_EXPORT} reports can be exported at once")
+    
+    # Bound how many results are held in memory while waiting for a render slot
+    render_slots = asyncio.Semaphore(pdf_renderer.workers * 2)
+    
+    async def render(job_id: str):
+        async with render_slots:
+            try:
+                cached = await get_cached_result(job_id)
+                return job_id, cached.result, await pdf_renderer.render(cached.result, cached.digest), None
+            except HTTPException as e:
+                return job_id, None, None, e.detail
+            except Exception as e:
+                logger.error(f"Error exporting PDF for {job_id}: {str(e)}")
+                return job_id, None, None, str(e)
+    
+    async def archive():
+        writer = ZipStreamWriter()
+        errors = []
+        tasks = [asyncio.create_task(render(job_id)) for job_id in job_ids]
+        try:
+            # Each report is streamed as soon as it is rendered
+            for next_report in asyncio.as_completed(tasks):
+                job_id, result, pdf_path, error = await next_report
+                if error:
+                    errors.append(f"{job_id}: {error}")
+                    continue
+                name = "".join(c if c.isalnum() else "_" for c in result['subject']['name'])
+                yield writer.open_entry(f"past_matters_report_{name}_{job_id}.pdf")
+                async with aiofiles.open(pdf_path, 'rb') as f:
+                    while chunk := await f.read(64 * 1024):
+                        yield writer.write(chunk)
+                yield writer.close_entry()
+            if errors:
+                yield writer.add_bytes("errors.txt", "\n".join(errors).encode("utf-8"))
+            yield writer.close()
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        archive(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="past_matters_reports.zip"'}
+    )
+
+@api_router.delete("/search/{job_id}")
+async def delete_search(job_id: str):
+    """Delete a finished search, its result, its profile and its uploaded photo"""
     try:
-        # Update status to processing
-        await db.searches.update_one(
-            {"id": job_id},
-            {"$set": {"status": "processing"}}
-        )
+        job = await search_store.get_status(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Search job not found")
+        
+        if job["status"] not in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail="Search is still in progress")
+        
+        result = await search_store.get_result(job_id)
+        deleted = await search_store.delete_job(job_id)
+        await job_profiler.delete(job_id)
+        result_cache.invalidate(job_id)
+        if result:
+            pdf_renderer.discard(result_digest(result))
+        
+        photo_path = deleted and deleted["input"].get("photo_path")
+        if photo_path:
+            await photo_store.release(photo_path)
         
+        return {"job_id": job_id, "deleted": True}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow only requests carrying ADMIN_TOKEN; admin endpoints are disabled without it"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+# Re-score runs in progress in this process
+rescore_tasks: Dict[str, asyncio.Task] = {}
+
+@api_router.post("/admin/rescore", dependencies=[Depends(require_admin)])
+async def start_rescore(request: RescoreRequest):
+    """Re-score all stored results with the current risk weights in the background"""
+    run_id = request.run_id or str(uuid.uuid4())
+    if run_id in rescore_tasks:
+        raise HTTPException(status_code=409, detail="Rescore run is already in progress")
+    
+    async def run():
+        try:
+            await result_rescorer.run(run_id)
+        except Exception as e:
+            logger.error(f"Rescore {run_id} failed: {str(e)}")
+        finally:
+            # Cached results may carry old scores
+            result_cache.clear()
+            rescore_tasks.pop(run_id, None)
+    
+    rescore_tasks[run_id] = asyncio.create_task(run())
+    return {"run_id": run_id, "status_url": f"/api/admin/rescore/{run_id}"}
+
+@api_router.get("/admin/profiles/{job_id}", dependencies=[Depends(require_admin)])
+async def get_profile(job_id: str, kind: str = Query("wall", pattern="^(wall|cpu)$"),
+                      format: str = Query("folded", pattern="^(folded|json)$")):
+    """Get the profile of a search as folded stacks (flamegraph.pl, speedscope) or JSON"""
+    profile = await job_profiler.get(job_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "json":
+        return profile
+    return PlainTextResponse(profile[kind] + "\n", headers={
+        "Content-Disposition": f'inline; filename="{job_id}.{kind}.folded"'
+    })
+
+@api_router.get("/admin/rescore/{run_id}", dependencies=[Depends(require_admin)])
+async def get_rescore(run_id: str):
+    """Get the checkpoint of a re-score run"""
+    checkpoint = await result_rescorer.get_checkpoint(run_id)
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Rescore run not found")
+    checkpoint["run_id"] = checkpoint.pop("_id")
+    # The _id of the last scored document, a bson ObjectId once a batch is done
+    if checkpoint.get("last_id") is not None:
+        checkpoint["last_id"] = str(checkpoint["last_id"])
+    checkpoint["running"] = run_id in rescore_tasks
+    return checkpoint
+
+async def process_search(job_id: str, input_data: Dict[str, Any], worker_id: Optional[str] = None):
+    """Process a search job claimed by a queue worker, profiling it if selected"""
+    if job_profiler.should_profile(input_data.get("profile", False)):
+        async with job_profiler.profile(job_id):
+            await run_search(job_id, input_data, worker_id)
+    else:
+        await run_search(job_id, input_data, worker_id)
+
+async def run_search(job_id: str, input_data: Dict[str, Any], worker_id: Optional[str] = None):
+    """
+    Run the search pipeline of a job and store its result
+
+    With the claiming worker's id, the result is only stored while that
+    worker still holds the job (its lease may have expired meanwhile).
+    """
+    try:
         # Initialize tools
-        photo_matcher = PhotoMatcher()
-        image_search = ReverseImageSearch()
-        court_scraper = CourtScraper()
-        matrimonial_scraper = MatrimonialScraper()
-        dating_scraper = DatingScraper()
-        social_scraper = SocialScraper()
-        
-        # Photo analysis if photo provided
-        photo_features = None
-        photo_search_results = None
-        if input_data.get("photo_path"):
-            logger.info(f"Job {job_id}: Analyzing photo...")
-            await update_progress(job_id, "photo_analysis", 20)
-            photo_features = photo_matcher.extract_face_features(input_data["photo_path"])
-            await update_progress(job_id, "photo_analysis", 100)
+        tools = source_factory()
+        sources = list(source_registry)
+        
+        # Identical searches running at the same time share each source's records
+        flight_key = search_key(input_data)
+        # Sources cut off at their deadline; the result says so rather than looking clean
+        incomplete_sources: List[str] = []
+        
+        async def run_source(source: SearchSource, results: Dict[str, Any]):
+            if not source.enabled(input_data):
+                return None if source.single else []
+            logger.info(f"Job {job_id}: {source.description}...")
+            await update_progress(job_id, source.name, 10)
+            search = SearchContext(job_id, input_data, tools, results)
+            records = []
+            stream = search_flight.stream((source.name, flight_key), lambda: source.records(search))
+            try:
+                async for record in until_deadline(stream, source.timeout):
+                    records.append(record)
+                    metrics.SOURCE_RECORDS.inc(source=source.name)
+            except asyncio.TimeoutError:
+                # Keep what arrived in time rather than failing the whole search
+                logger.warning(f"Job {job_id}: {source.name} timed out after {source.timeout}s "
+                               f"with {len(records)} records")
+                metrics.SOURCE_TIMEOUTS.inc(source=source.name)
+                incomplete_sources.append(source.name)
+            await update_progress(job_id, source.name, 100)
+            if source.single:
+                return records[0] if records else None
+            return records
+        
+        async def risk_calculation(results: Dict[str, Any]):
+            court_cases: List[Dict[str, Any]] = []
+            all_profiles: List[Dict[str, Any]] = []
+            photo_search_results = results.get("reverse_image_search")
+            for source in sources:
+                if source.record_type == "court_case":
+                    court_cases.extend(results[source.name])
+                elif source.record_type == "profile":
+                    all_profiles.extend(results[source.name])
+                    # Add photo search results to profiles if available
+                    if photo_search_results and source.photo_matches:
+                        all_profiles.extend(
+                            photo_match_profile(match, source.photo_matches)
+                            for match in photo_search_results[source.photo_matches]
+                        )
             
-            # If photo-only search, perform reverse image search
-            if input_data.get("search_type") == "photo_only":
-                logger.info(f"Job {job_id}: Performing reverse image search...")
-                await update_progress(job_id, "reverse_image_search", 20)
-                photo_search_results = await image_search.comprehensive_photo_search(input_data["photo_path"])
-                await update_progress(job_id, "reverse_image_search", 100)
-        
-        # Determine search parameters
-        search_name = input_data.get("name") or "Unknown"
-        if input_data.get("search_type") == "photo_only" and photo_search_results:
-            # Try to extract name from photo search results
-            if photo_search_results['social_media']:
-                search_name = photo_search_results['social_media'][0].get('profile_name', 'Unknown')
-        
-        # Scrape court cases
-        if input_data.get("name"):
-            logger.info(f"Job {job_id}: Scraping court cases...")
-            await update_progress(job_id, "court_cases", 10)
-            court_cases = await court_scraper.scrape(input_data["name"], input_data.get("state"))
-            await update_progress(job_id, "court_cases", 100)
-        else:
-            court_cases = []
-            await update_progress(job_id, "court_cases", 100)
-        
-        # Scrape matrimonial profiles
-        logger.info(f"Job {job_id}: Scraping matrimonial profiles...")
-        await update_progress(job_id, "matrimonial_profiles", 10)
-        matrimonial_profiles = await matrimonial_scraper.scrape(search_name, input_data.get("email"))
-        await update_progress(job_id, "matrimonial_profiles", 100)
-        
-        # Scrape dating profiles
-        logger.info(f"Job {job_id}: Scraping dating profiles...")
-        await update_progress(job_id, "dating_profiles", 10)
-        dating_profiles = await dating_scraper.scrape(search_name, input_data.get("email"))
-        await update_progress(job_id, "dating_profiles", 100)
-        
-        # Scrape social media
-        logger.info(f"Job {job_id}: Scraping social media...")
-        await update_progress(job_id, "social_media", 10)
-        social_profiles = await social_scraper.scrape(search_name, input_data.get("email"))
-        await update_progress(job_id, "social_media", 100)
-        
-        # Add photo search results to profiles if available
-        if photo_search_results:
-            for social_match in photo_search_results['social_media']:
-                social_profiles.append({
-                    'platform': social_match['platform'],
-                    'profile_url': social_match['profile_url'],
-                    'created_date': social_match.get('last_updated'),
-                    'relationship_status_history': [],
-                    'activity_pattern': {
-                        'photo_match_confidence': social_match['match_confidence'],
-                        'photo_count': social_match.get('photo_count', 0)
-                    },
-                    'photo_matched': True
-                })
-            
-            for dating_match in photo_search_results['dating_apps']:
-                dating_profiles.append({
-                    'platform': dating_match['platform'],
-                    'profile_url': dating_match['profile_url'],
-                    'created_date': None,
-                    'relationship_status_history': [],
-                    'activity_pattern': {
-                        'photo_match_confidence': dating_match['match_confidence'],
-                        'profile_active': dating_match.get('profile_active', False),
-                        'photo_matches': dating_match.get('photo_matches', 0)
-                    },
-                    'photo_matched': True
-                })
-        
-        # Combine all social profiles
-        all_profiles = matrimonial_profiles + dating_profiles + social_profiles
-        
-        # Calculate risk score
-        logger.info(f"Job {job_id}: Calculating risk score...")
-        await update_progress(job_id, "risk_calculation", 50)
-        calculator = RiskCalculator()
-        risk_result = calculator.calculate_risk(court_cases, all_profiles)
-        await update_progress(job_id, "risk_calculation", 100)
+            # Calculate risk score
+            logger.info(f"Job {job_id}: Calculating risk score...")
+            await update_progress(job_id, "risk_calculation", 50)
+            calculator = RiskCalculator()
+            risk_result = calculator.calculate_risk(court_cases, all_profiles, incomplete_sources)
+            await update_progress(job_id, "risk_calculation", 100)
+            return {"risk_score": risk_result, "court_cases": court_cases, "profiles": all_profiles}
+        
+        # Sources run as soon as their dependencies finish; those holding browsers are
+        # limited so that at most BROWSER_STAGE_LIMIT contexts are in use per source
+        browser_limit = int(os.environ.get('BROWSER_STAGE_LIMIT', 8))
+        graph = StageGraph()
+        for source in sources:
+            graph.add(
+                source.name,
+                lambda results, source=source: run_source(source, results),
+                depends_on=source.depends_on,
+                limit=max(browser_limit // source.cost, 1) if source.cost else None
+            )
+        graph.add("risk_calculation", risk_calculation, depends_on=[source.name for source in sources])
+        results = await graph.run()
         
         # Prepare result
+        photo_features = results.get("photo_analysis")
+        all_profiles = results["risk_calculation"]["profiles"]
         photo_matched = bool(photo_features and photo_features.get('face_detected'))
         result = {
             "subject": {
-                "name": search_name,
+                "name": SearchContext(job_id, input_data, tools, results).search_name,
                 "dob": input_data.get("dob", "Unknown"),
                 "photo_matched": photo_matched,
                 "photo_info": photo_features if photo_features else None
             },
-            "risk_score": risk_result,
-            "court_cases": court_cases,
+            "risk_score": results["risk_calculation"]["risk_score"],
+            "court_cases": results["risk_calculation"]["court_cases"],
             "social_profiles": all_profiles,
             "relationship_timeline": extract_relationship_timeline(all_profiles),
             "generated_at": datetime.now(timezone.utc).isoformat()
         }
-        
-        # Update job with result
-        await db.searches.update_one(
-            {"id": job_id},
-            {"$set": {
-                "status": "completed",
-                "result": result,
-                "completed_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
+        if incomplete_sources:
+            result["incomplete_sources"] = incomplete_sources
+        
+        pipeline = graph.summary()
+        logger.info(f"Job {job_id}: Critical path {' -> '.join(pipeline['critical_path'])} "
+                    f"({pipeline['critical_path_ms']}ms)")
+        
+        # Store result and mark the job completed
+        job = await search_store.complete(job_id, result, {
+            "pipeline": pipeline,
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        }, worker_id=worker_id)
+        if not job:
+            logger.warning(f"Job {job_id}: no longer held by worker {worker_id}, result discarded")
+            return
+        progress_bus.publish(job_id, status_event(job_id, job))
+        if pdf_renderer.prerender_enabled:
+            # Warms the result cache too; the client fetches the result next
+            pdf_renderer.prerender(result, result_cache.put(job_id, result).digest)
+        metrics.JOB_OUTCOMES.inc(outcome="completed")
         
         logger.info(f"Job {job_id}: Completed successfully")
         
     except Exception as e:
         logger.error(f"Job {job_id} failed: {str(e)}")
-        await db.searches.update_one(
-            {"id": job_id},
-            {"$set": {
-                "status": "failed",
-                "error": str(e)
-            }}
-        )
+        await fail_search(job_id, str(e), worker_id)
+
+async def fail_search(job_id: str, error: str, worker_id: Optional[str] = None):
+    """
+    Mark a job failed and publish its terminal status to streaming clients
+
+    With the claiming worker's id, only a job that worker still holds is failed.
+    """
+    job = await search_store.fail(job_id, error, worker_id)
+    if not job:
+        logger.warning(f"Job {job_id}: no longer held by worker {worker_id}, not marking it failed")
+        return
+    metrics.JOB_OUTCOMES.inc(outcome="failed")
+    progress_bus.publish(job_id, status_event(job_id, job))
+
+async def update_progress(job_id: str, stage: str, progress: int) -> Optional[Dict[str, Any]]:
+    """
+    Update progress for a specific stage
+
+    Publishes the new status to streaming clients.
 
-async def update_progress(job_id: str, stage: str, progress: int):
-    """Update progress for a specific stage"""
-    job = await db.searches.find_one({"id": job_id})
+    Returns:
+        The updated status and progress, or None if the job is missing or terminal
+    """
+    job = await search_store.update_progress(job_id, stage, progress)
     if job:
-        job["progress"]["stages"][stage] = progress
-        
-        # Calculate overall progress
-        total_stages = len(job["progress"]["stages"])
-        overall = sum(job["progress"]["stages"].values()) // total_stages
-        job["progress"]["overall"] = overall
-        
-        await db.searches.update_one(
-            {"id": job_id},
-            {"$set": {"progress": job["progress"]}}
-        )
+        progress_bus.publish(job_id, status_event(job_id, job))
+    return job
 
 def extract_relationship_timeline(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Extract relationship timeline from social profiles"""
-    timeline = []
-    for profile in profiles:
-        if "relationship_status_history" in profile:
-            for change in profile["relationship_status_history"]:
-                timeline.append({
-                    "date": change.get("date"),
-                    "previous_status": change.get("previous_status"),
-                    "new_status": change.get("new_status"),
-                    "platform": profile["platform"]
-                })
-    
-    # Sort by date
-    timeline.sort(key=lambda x: x["date"] if x["date"] else "", reverse=True)
-    return timeline
+    """Extract relationship timeline from social profiles, newest first"""
+    return RelationshipTimeline(profiles).to_list()
+
+def default_sources() -> Dict[str, Any]:
+    """The real data sources of a search; the load test harness swaps in offline stand-ins"""
+    return {
+        "photo_analyzer": image_preprocessor,
+        "image_search": ReverseImageSearch(browser_pool),
+        "court": CourtScraper(browser_pool),
+        "matrimonial": MatrimonialScraper(browser_pool),
+        "dating": DatingScraper(),
+        "social": SocialScraper(browser_pool)
+    }
+
+# Builds the sources of each search
+source_factory: Callable[[], Dict[str, Any]] = default_sources
+
+# Per-source cache of lookups, shared across jobs and nodes
+source_cache = SourceCache.from_env(db.source_cache, ["court_cases"])
+
+# Sources of the search pipeline; register new ones here
+source_registry = default_registry(source_cache)
+
+# Coalesces source calls of identical concurrent searches
+search_flight = SingleFlight()
+
+# Pushes status changes to streaming clients
+progress_bus = ProgressBus.from_env(search_store.jobs)
+
+# Warm browsers shared by all scrapers in this process
+browser_pool = BrowserPool.from_env()
+
+# Durable job queue feeding process_search
+search_queue = SearchJobQueue.from_env(search_store.jobs, process_search, fail_search)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Pipeline metrics in Prometheus text format"""
+    try:
+        metrics.QUEUE_DEPTH.set(await search_queue.depth())
+    except Exception as e:
+        logger.error(f"Error reading queue depth: {str(e)}")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+# Multipart overhead and the text fields allowed on top of the photo itself
+SEARCH_FORM_OVERHEAD = 64 * 1024
+
+class SearchUploadLimit:
+    """
+    Refuse searches with bodies over the photo limit plus form overhead
+
+    Content-Length is checked before the form is parsed. Bodies without one
+    (chunked uploads) are counted as they are received, and reading past the
+    limit fails the request with 413.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != "/api/search":
+            await self.app(scope, receive, send)
+            return
+        
+        limit = photo_store.max_bytes + SEARCH_FORM_OVERHEAD
+        detail = f"Photo exceeds the {photo_store.max_bytes} byte limit"
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await FastJSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised into the form parser and answered by the router's exception handling
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(SearchUploadLimit)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -457,6 +894,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_search_queue():
+    await search_store.ensure_indexes()
+    await source_cache.ensure_indexes()
+    await progress_bus.start()
+    await browser_pool.start()
+    pdf_renderer.start()
+    image_preprocessor.start()
+    await search_queue.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await search_queue.stop()
+    # Interrupted re-score runs resume from their checkpoint
+    for task in list(rescore_tasks.values()):
+        task.cancel()
+    await browser_pool.stop()
+    pdf_renderer.stop()
+    image_preprocessor.stop()
+    await progress_bus.stop()
     client.close()
\ No newline at end of file
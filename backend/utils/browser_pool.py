@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from playwright.async_api import async_playwright, Browser, Page, Playwright
+from utils.metrics import BROWSER_LAUNCHES
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+class _PooledBrowser:
+    """A warm browser together with its lease bookkeeping"""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.uses = 0
+        self.active = 0
+        self.retiring = False
+
+class BrowserPool:
+    """
+    Pool of warm Chromium browsers shared by all scrapers
+
+    Callers lease an isolated context/page; the pool caps the number of open
+    contexts, retires browsers after a fixed number of leases and replaces
+    browsers that have crashed or disconnected.
+    """
+
+    def __init__(self, size: int = 2, max_contexts: int = 8, max_uses: int = 100,
+                 health_interval: float = 30.0):
+        self.size = size
+        self.max_contexts = max_contexts
+        self.max_uses = max_uses
+        self.health_interval = health_interval
+        self.launches = 0
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        # Browsers being launched; they count against size before they join the pool
+        self._launching = 0
+        # Guards the browser list; notified when a browser joins or leaves it
+        self._changed = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "BrowserPool":
+        """Build a pool configured from BROWSER_* environment variables"""
+        return cls(
+            size=int(os.environ.get('BROWSER_POOL_SIZE', 2)),
+            max_contexts=int(os.environ.get('BROWSER_MAX_CONTEXTS', 8)),
+            max_uses=int(os.environ.get('BROWSER_MAX_USES', 100)),
+            health_interval=float(os.environ.get('BROWSER_HEALTH_INTERVAL', 30))
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """Start Playwright and launch the warm browsers"""
+        try:
+            self._playwright = await async_playwright().start()
+            for _ in range(self.size):
+                self._browsers.append(await self._launch())
+            self._health_task = asyncio.create_task(self._health_loop())
+            logger.info(f"Browser pool started with {self.size} browsers, max {self.max_contexts} contexts")
+        except Exception as e:
+            logger.error(f"Browser pool failed to start: {str(e)}")
+            await self.stop()
+
+    async def stop(self):
+        """Close all browsers and stop Playwright"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        async with self._changed:
+            browsers, self._browsers = self._browsers, []
+            playwright, self._playwright = self._playwright, None
+            # Waiting leases fail instead of waiting for a browser that never comes
+            self._changed.notify_all()
+        for pooled in browsers:
+            await self._close(pooled)
+        if playwright:
+            await playwright.stop()
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=True)
+        self.launches += 1
+        BROWSER_LAUNCHES.inc()
+        return _PooledBrowser(browser)
+
+    async def _close(self, pooled: _PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {str(e)}")
+
+    def _reserve_slots(self) -> int:
+        """Claim the free browser slots for launching; call with the lock held"""
+        if not self.running:
+            return 0
+        free = max(self.size - len(self._browsers) - self._launching, 0)
+        self._launching += free
+        return free
+
+    def _take_disconnected(self, idle_only: bool = False) -> List[_PooledBrowser]:
+        """Remove browsers that are no longer connected; call with the lock held"""
+        dead = [b for b in self._browsers
+                if not b.browser.is_connected() and not (idle_only and b.active)]
+        for pooled in dead:
+            self._browsers.remove(pooled)
+        return dead
+
+    async def _fill(self, slots: int):
+        """Launch browsers into reserved slots, outside the lock"""
+        for launched in range(slots):
+            try:
+                pooled = await self._launch()
+            except Exception:
+                async with self._changed:
+                    self._launching -= slots - launched
+                    self._changed.notify_all()
+                raise
+            async with self._changed:
+                self._launching -= 1
+                if self.running:
+                    self._browsers.append(pooled)
+                    pooled = None
+                self._changed.notify_all()
+            if pooled:
+                # The pool stopped while the browser was launching
+                await self._close(pooled)
+
+    async def _acquire(self) -> _PooledBrowser:
+        """
+        Lease the least busy healthy browser
+
+        Browsers are launched outside the lock. While every browser is retiring
+        and the pool is full, the lease waits for a retired browser's
+        replacement rather than growing the pool past size.
+        """
+        while True:
+            pooled = None
+            async with self._changed:
+                if not self.running:
+                    raise RuntimeError("Browser pool is not running")
+                dead = self._take_disconnected()
+                if dead:
+                    logger.warning(f"{len(dead)} pooled browser(s) disconnected, relaunching")
+                candidates = [b for b in self._browsers if not b.retiring]
+                if candidates:
+                    pooled = min(candidates, key=lambda b: b.active)
+                    pooled.uses += 1
+                    pooled.active += 1
+                    if pooled.uses >= self.max_uses:
+                        pooled.retiring = True
+                    slots = 0
+                else:
+                    slots = self._reserve_slots()
+                    if not slots and not dead:
+                        await self._changed.wait()
+                        continue
+            for browser in dead:
+                await self._close(browser)
+            if pooled is not None:
+                return pooled
+            await self._fill(slots)
+
+    async def _release(self, pooled: _PooledBrowser):
+        slots = 0
+        async with self._changed:
+            pooled.active -= 1
+            retired = pooled.retiring and pooled.active == 0 and pooled in self._browsers
+            if retired:
+                logger.info(f"Recycling browser after {pooled.uses} uses")
+                self._browsers.remove(pooled)
+                slots = self._reserve_slots()
+        if retired:
+            await self._close(pooled)
+            await self._fill_logged(slots)
+
+    async def _fill_logged(self, slots: int):
+        """Fill reserved slots, logging rather than raising launch failures"""
+        try:
+            await self._fill(slots)
+        except Exception as e:
+            logger.error(f"Failed to launch pooled browser: {str(e)}")
+
+    async def _health_loop(self):
+        """Periodically replace browsers that are no longer connected"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                async with self._changed:
+                    dead = self._take_disconnected(idle_only=True)
+                    slots = self._reserve_slots()
+                for pooled in dead:
+                    logger.warning("Health check found dead browser, relaunching")
+                    await self._close(pooled)
+                await self._fill(slots)
+            except Exception as e:
+                logger.error(f"Browser pool health check failed: {str(e)}")
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Lease a page in a fresh, isolated browser context"""
+        if not self.running:
+            raise RuntimeError("Browser pool is not running")
+        async with self._semaphore:
+            pooled = await self._acquire()
+            try:
+                context = await pooled.browser.new_context(user_agent=USER_AGENT)
+                try:
+                    yield await context.new_page()
+                finally:
+                    await context.close()
+            finally:
+                await self._release(pooled)
+
+@asynccontextmanager
+async def browser_page(pool: Optional[BrowserPool] = None) -> AsyncIterator[Page]:
+    """
+    Get a browser page, leased from the pool when one is running
+
+    Without a running pool a dedicated browser is launched and closed afterwards,
+    which keeps the scrapers usable outside the API process.
+    """
+    if pool and pool.running:
+        async with pool.page() as page:
+            yield page
+        return
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        BROWSER_LAUNCHES.inc()
+        try:
+            context = await browser.new_context(user_agent=USER_AGENT)
+            yield await context.new_page()
+        finally:
+            await browser.close()
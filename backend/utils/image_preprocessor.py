@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# One matcher per worker process, with its face cascade loaded by the pool initializer
+_matcher = None
+
+def _init_worker():
+    global _matcher
+    from utils.photo_matcher import PhotoMatcher
+    _matcher = PhotoMatcher()
+    _matcher.face_cascade()
+
+def _analyze(image_path: str, max_dimension: int) -> Optional[Dict[str, Any]]:
+    return _matcher.extract_face_features(image_path, max_dimension)
+
+class ImagePreprocessor:
+    """
+    Analyze uploaded photos in a process pool
+
+    Each photo is decoded once, downscaled to at most max_dimension pixels per
+    side and run through face detection and hashing off the event loop.
+    Features are cached by photo: uploads are stored under their content hash,
+    so repeated uploads of the same image are analyzed once. A pool broken by
+    a crashed worker is replaced and the analysis retried once.
+    """
+
+    def __init__(self, workers: int = 2, max_dimension: int = 1600, cache_entries: int = 256):
+        self.workers = workers
+        self.max_dimension = max_dimension
+        self.cache_entries = cache_entries
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "ImagePreprocessor":
+        return cls(
+            workers=int(os.environ.get('IMAGE_WORKERS', 2)),
+            max_dimension=int(os.environ.get('IMAGE_MAX_DIMENSION', 1600)),
+            cache_entries=int(os.environ.get('IMAGE_FEATURE_CACHE_ENTRIES', 256))
+        )
+
+    def start(self):
+        if self._executor is None:
+            # Spawned workers don't inherit the event loop's threads and sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def analyze(self, image_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the face features of a photo, or None if no face was found
+
+        Concurrent requests for the same photo share one analysis.
+        """
+        # Content-addressed uploads are named by their SHA-256
+        key = Path(image_path).stem
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._run(image_path))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        features = await asyncio.shield(pending)
+
+        self._cache[key] = features
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return features
+
+    async def _run(self, image_path: str) -> Optional[Dict[str, Any]]:
+        self.start()
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, _analyze, image_path, self.max_dimension)
+        except BrokenProcessPool:
+            # A worker died (e.g. crashed in the image decoder); the pool rejects all work from now on
+            logger.warning("Image analysis pool is broken, restarting it")
+            if self._executor is executor:
+                self.stop()
+            self.start()
+            return await loop.run_in_executor(self._executor, _analyze, image_path, self.max_dimension)
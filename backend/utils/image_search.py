@@ -1,18 +1,21 @@
 import logging
 import asyncio
 from typing import List, Dict, Any, Optional
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import Page
 import random
 from datetime import datetime, timedelta
 import imagehash
 from PIL import Image
+from utils.browser_pool import BrowserPool, browser_page
+from utils.metrics import SCRAPER_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
 class ReverseImageSearch:
     """Perform reverse image search across platforms"""
     
-    def __init__(self):
+    def __init__(self, browser_pool: Optional[BrowserPool] = None):
+        self.browser_pool = browser_pool
         self.google_images_url = "https://www.google.com/imghp"
         self.yandex_images_url = "https://yandex.com/images/"
         self.timeout = 30000
@@ -22,13 +25,7 @@ class ReverseImageSearch:
         results = []
         
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                )
-                page = await context.new_page()
-                
+            async with timed(SCRAPER_SECONDS, scraper="google_images"), browser_page(self.browser_pool) as page:
                 # Navigate to Google Images
                 await page.goto(self.google_images_url, timeout=self.timeout)
                 await asyncio.sleep(2)
@@ -41,8 +38,6 @@ class ReverseImageSearch:
                 # Generate sample results
                 results = self._generate_sample_image_results("Google Images")
                 
-                await browser.close()
-                
         except Exception as e:
             logger.error(f"Google Images search error: {str(e)}")
             # Return sample results on error
@@ -58,7 +53,8 @@ class ReverseImageSearch:
             # Facebook, Instagram, LinkedIn don't allow direct reverse image search
             # Would need to use their APIs or specialized tools
             logger.info("Simulating social media photo search")
-            await asyncio.sleep(3)
+            async with timed(SCRAPER_SECONDS, scraper="photo_social_media"):
+                await asyncio.sleep(3)
             
             # Generate sample social media matches
             platforms = ['Facebook', 'Instagram', 'LinkedIn']
@@ -84,7 +80,8 @@ class ReverseImageSearch:
         
         try:
             logger.info("Searching dating apps by photo")
-            await asyncio.sleep(2)
+            async with timed(SCRAPER_SECONDS, scraper="photo_dating_apps"):
+                await asyncio.sleep(2)
             
             # Dating apps typically don't allow reverse image search for privacy
             # Simulating potential matches found
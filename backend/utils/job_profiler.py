@@ -0,0 +1,211 @@
+"""
+Sampling profiler for individual search jobs
+
+A profiled job registers every task it starts (through a task factory and a
+context variable, so concurrent stages are included) and a background thread
+samples them at a fixed interval:
+
+- wall samples record where each of the job's tasks is, whether running or
+  suspended in an await, built from the task's coroutine chain
+- CPU samples record the event loop thread's stack when the task running on
+  it belongs to the job
+
+Profiles are stored as folded stacks ("outer;inner count" per line), which
+flamegraph.pl, speedscope and inferno read directly.
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Profile of the job running in the current context
+_current_profile: ContextVar[Optional["JobProfile"]] = ContextVar("job_profile", default=None)
+
+class JobProfile:
+    """Samples collected for one job"""
+
+    def __init__(self, job_id: str, loop_thread: int):
+        self.job_id = job_id
+        self.loop_thread = loop_thread
+        # Appended to on the loop thread, copied by the sampler thread
+        self.tasks: List[asyncio.Task] = []
+        self.cpu: Counter = Counter()
+        self.wall: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+
+    def to_document(self, interval: float) -> Dict[str, Any]:
+        return {
+            "_id": self.job_id,
+            "job_id": self.job_id,
+            "interval_ms": round(interval * 1000, 3),
+            "samples": self.samples,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "cpu": _folded(self.cpu),
+            "wall": _folded(self.wall),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+class JobProfiler:
+    """
+    Capture CPU and wall-clock profiles of selected jobs
+
+    Jobs are profiled when explicitly requested or at random with probability
+    sample_rate. The sampler thread only runs while a profiled job is active.
+    """
+
+    def __init__(self, collection, sample_rate: float = 0.0, interval: float = 0.005):
+        self.collection = collection
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._active: Set[JobProfile] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._factory_loops: Set[int] = set()
+
+    @classmethod
+    def from_env(cls, collection) -> "JobProfiler":
+        return cls(
+            collection,
+            sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+            interval=float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+        )
+
+    def should_profile(self, requested: bool = False) -> bool:
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @asynccontextmanager
+    async def profile(self, job_id: str) -> AsyncIterator[JobProfile]:
+        """Profile the job running inside the block, then store its profile"""
+        loop = asyncio.get_running_loop()
+        self._install_task_factory(loop)
+        profile = JobProfile(job_id, threading.get_ident())
+        profile.tasks.append(asyncio.current_task())
+        token = _current_profile.set(profile)
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, args=(loop,),
+                                                name="job-profiler", daemon=True)
+                self._thread.start()
+        try:
+            yield profile
+        finally:
+            _current_profile.reset(token)
+            with self._lock:
+                self._active.discard(profile)
+            try:
+                await self.collection.replace_one(
+                    {"_id": job_id}, profile.to_document(self.interval), upsert=True
+                )
+                logger.info(f"Job {job_id}: stored profile with {profile.samples} samples")
+            except Exception as e:
+                logger.error(f"Failed to store profile of job {job_id}: {str(e)}")
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": job_id}, {"_id": 0})
+
+    async def delete(self, job_id: str):
+        """Delete the stored profile of a job, if it was profiled"""
+        await self.collection.delete_one({"_id": job_id})
+
+    def _install_task_factory(self, loop: asyncio.AbstractEventLoop):
+        """Register tasks created inside a profiled job with its profile"""
+        if id(loop) in self._factory_loops:
+            return
+        self._factory_loops.add(id(loop))
+        previous = loop.get_task_factory()
+
+        def task_factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            profile = context.get(_current_profile) if context is not None else _current_profile.get()
+            if profile is not None:
+                profile.tasks.append(task)
+            return task
+
+        loop.set_task_factory(task_factory)
+
+    def _sample_loop(self, loop: asyncio.AbstractEventLoop):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                profiles = list(self._active)
+                if not profiles:
+                    self._thread = None
+                    return
+            try:
+                running = asyncio.current_task(loop)
+            except RuntimeError:
+                running = None
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    self._sample(profile, running, frames.get(profile.loop_thread))
+                except Exception as e:
+                    # The loop thread keeps running while we read its tasks
+                    logger.debug(f"Dropped profile sample of job {profile.job_id}: {str(e)}")
+
+    @staticmethod
+    def _sample(profile: JobProfile, running: Optional[asyncio.Task], thread_frame):
+        profile.samples += 1
+        for task in profile.tasks[:]:
+            if task.done():
+                continue
+            coroutine_frames, awaiting = _coroutine_frames(task.get_coro())
+            if task is running and thread_frame is not None:
+                # Add the synchronous calls made by the innermost coroutine
+                stack = [_label(frame) for frame in coroutine_frames]
+                stack.extend(_label(frame) for frame in _frames_below(thread_frame, coroutine_frames[-1:]))
+                folded = ";".join(stack)
+                profile.cpu[folded] += 1
+                profile.wall[folded] += 1
+            elif coroutine_frames:
+                stack = [_label(frame) for frame in coroutine_frames]
+                if awaiting:
+                    stack.append(awaiting)
+                profile.wall[";".join(stack)] += 1
+
+def _coroutine_frames(coro):
+    """Frames of a coroutine and those it awaits, outermost first, and what the innermost awaits"""
+    frames = []
+    awaiting = None
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            awaiting = f"<await {type(coro).__name__}>"
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames, awaiting
+
+def _frames_below(thread_frame, anchor: List[Any]) -> List[Any]:
+    """Frames of the thread's stack called from the anchor frame, outermost first"""
+    frames = []
+    frame = thread_frame
+    while frame is not None:
+        if anchor and frame is anchor[0]:
+            frames.reverse()
+            return frames
+        frames.append(frame)
+        frame = frame.f_back
+    return []
+
+def _label(frame) -> str:
+    code = frame.f_code
+    filename = "/".join(code.co_filename.replace("\\", "/").rsplit("/", 2)[-2:])
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+def _folded(stacks: Counter) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from utils.metrics import JOB_ROUND_TRIPS, JOBS_IN_FLIGHT, job_round_trips
+
+logger = logging.getLogger(__name__)
+
+class SearchJobQueue:
+    """Durable MongoDB-backed queue for search jobs with a bounded worker pool
+
+    Jobs live in the searches collection. A worker claims the oldest queued job
+    (or one whose lease has expired because its worker died) by atomically
+    setting status to "processing" together with a lease, and keeps the lease
+    alive with heartbeats while the job runs. A job claimed more than
+    max_attempts times is handed to on_exhausted instead of the handler.
+    Both get the claiming worker's id, so their final writes can be limited
+    to jobs the worker still holds.
+    """
+
+    def __init__(self, collection, handler: Callable[[str, Dict[str, Any], str], Awaitable[None]],
+                 on_exhausted: Optional[Callable[[str, str, str], Awaitable[Any]]] = None,
+                 workers: int = 4, max_pending: int = 50, lease_seconds: int = 60,
+                 poll_interval: float = 2.0, max_attempts: int = 3, retry_after: int = 30):
+        self.collection = collection
+        self.handler = handler
+        self.on_exhausted = on_exhausted
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_after = retry_after
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.in_flight = 0
+
+    @classmethod
+    def from_env(cls, collection, handler: Callable[[str, Dict[str, Any], str], Awaitable[None]],
+                 on_exhausted: Optional[Callable[[str, str, str], Awaitable[Any]]] = None) -> "SearchJobQueue":
+        """Build a queue configured from SEARCH_* environment variables"""
+        return cls(
+            collection,
+            handler,
+            on_exhausted,
+            workers=int(os.environ.get('SEARCH_WORKERS', 4)),
+            max_pending=int(os.environ.get('SEARCH_QUEUE_MAX', 50)),
+            lease_seconds=int(os.environ.get('SEARCH_LEASE_SECONDS', 60)),
+            poll_interval=float(os.environ.get('SEARCH_QUEUE_POLL_SECONDS', 2.0)),
+            max_attempts=int(os.environ.get('SEARCH_MAX_ATTEMPTS', 3)),
+            retry_after=int(os.environ.get('SEARCH_RETRY_AFTER', 30))
+        )
+
+    async def start(self):
+        """Start the worker pool"""
+        self._stopping = False
+        for n in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(f"{self.node_id}-{n}")))
+        logger.info(f"Search queue started with {self.workers} workers on {self.node_id}")
+
+    async def stop(self):
+        """Stop the worker pool; in-flight jobs are picked up again once their lease expires"""
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a job has been enqueued"""
+        self._wakeup.set()
+
+    async def admission_check(self) -> Optional[int]:
+        """
+        Check whether a new job can be accepted
+
+        Returns:
+            None if the job is admitted, otherwise the suggested Retry-After in seconds
+        """
+        queued = await self.collection.count_documents({"status": "queued"}, limit=self.max_pending)
+        if queued >= self.max_pending:
+            logger.warning(f"Search queue saturated ({queued} queued), rejecting request")
+            return self.retry_after
+        return None
+
+    async def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return await self.collection.count_documents({"status": "queued"})
+
+    async def _claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically claim the oldest runnable job"""
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "processing", "lease_expires_at": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": "processing",
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now.isoformat()
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            projection={"_id": 0, "id": 1, "input": 1, "attempts": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _heartbeat(self, job_id: str, worker_id: str):
+        """Extend the lease of a running job until cancelled"""
+        interval = max(self.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.collection.update_one(
+                    {"id": job_id, "worker_id": worker_id, "status": "processing"},
+                    {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                logger.error(f"Heartbeat failed for job {job_id}: {str(e)}")
+
+    async def _worker(self, worker_id: str):
+        """Claim and run jobs until the queue is stopped"""
+        while not self._stopping:
+            try:
+                job = await self._claim(worker_id)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to claim a job: {str(e)}")
+                job = None
+
+            if not job:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id = job["id"]
+            if job.get("attempts", 1) > self.max_attempts:
+                logger.error(f"Job {job_id} exceeded {self.max_attempts} attempts, giving up")
+                error = "Search was interrupted too many times"
+                try:
+                    if self.on_exhausted:
+                        await self.on_exhausted(job_id, error, worker_id)
+                    else:
+                        await self.collection.update_one(
+                            {"id": job_id, "worker_id": worker_id, "status": "processing"},
+                            {"$set": {"status": "failed", "error": error}}
+                        )
+                except Exception as e:
+                    logger.error(f"Failed to mark job {job_id} failed: {str(e)}")
+                continue
+
+            heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_id))
+            self.in_flight += 1
+            JOBS_IN_FLIGHT.inc()
+            try:
+                with job_round_trips() as trips:
+                    await self.handler(job_id, job["input"], worker_id)
+                JOB_ROUND_TRIPS.observe(trips[0])
+            except Exception as e:
+                logger.error(f"Worker {worker_id} crashed on job {job_id}: {str(e)}")
+            finally:
+                self.in_flight -= 1
+                JOBS_IN_FLIGHT.dec()
+                heartbeat.cancel()
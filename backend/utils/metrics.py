@@ -0,0 +1,269 @@
+"""
+In-process metrics for the search pipeline, rendered in Prometheus text format
+
+Metrics are plain counters kept per label set and are only updated from the
+event loop thread, so recording one is a dict lookup and an addition. Stages
+and scrapers time themselves with `timed`, which works as both a sync and an
+async context manager.
+"""
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; scrapers take seconds to tens of seconds, Mongo-only stages milliseconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+class Metric(ABC):
+    """A named metric with one value per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _format(self, key: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in pairs) + "}"
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """The metric's sample lines in Prometheus text format"""
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples()
+        ]
+
+class Counter(Metric):
+    """A value that only goes up"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{self._format(key)} {_number(value)}"
+
+class Gauge(Metric):
+    """
+    A value that goes up and down
+
+    A gauge built with a function reads it at render time instead of being set.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self.function is not None:
+            return self.function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        if self.function is not None:
+            yield f"{self.name} {_number(self.function())}"
+            return
+        for key, value in self._values.items():
+            yield f"{self.name}{self._format(key)} {_number(value)}"
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count of each bucket (plus +Inf) and the sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        # Buckets are upper bounds, inclusive
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> Iterator[str]:
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{self._format(key, ('le', _number(bound)))} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{self._format(key, ('le', '+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{self._format(key)} {_number(self._sums[key])}"
+            yield f"{self.name}_count{self._format(key)} {cumulative}"
+
+class timed:
+    """
+    Observe the duration of a block in a histogram
+
+    Usable as `with timed(...)` and `async with timed(...)`; the duration is
+    recorded whether the block returns or raises.
+    """
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, **labels: str):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "timed":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+    async def __aenter__(self) -> "timed":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+class MetricsRegistry:
+    """The metrics exposed at /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "past_matters_stage_duration_seconds", "Duration of search pipeline stages", ["stage"]
+))
+STAGE_OUTCOMES = REGISTRY.register(Counter(
+    "past_matters_stage_outcomes_total", "Search pipeline stages by outcome", ["stage", "outcome"]
+))
+JOB_OUTCOMES = REGISTRY.register(Counter(
+    "past_matters_jobs_total", "Finished search jobs by outcome", ["outcome"]
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "past_matters_queue_depth", "Search jobs waiting for a worker"
+))
+JOBS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "past_matters_jobs_in_flight", "Search jobs being processed by this process"
+))
+MONGO_OPERATIONS = REGISTRY.register(Counter(
+    "past_matters_mongo_operations_total", "MongoDB round trips by operation", ["operation"]
+))
+JOB_ROUND_TRIPS = REGISTRY.register(Histogram(
+    "past_matters_job_mongo_round_trips", "MongoDB round trips per search job",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 250)
+))
+BROWSER_LAUNCHES = REGISTRY.register(Counter(
+    "past_matters_browser_launches_total", "Chromium browsers launched"
+))
+SCRAPER_SECONDS = REGISTRY.register(Histogram(
+    "past_matters_scraper_duration_seconds", "Duration of scraper calls, including the browser lease",
+    ["scraper"]
+))
+SOURCE_RECORDS = REGISTRY.register(Counter(
+    "past_matters_source_records_total", "Records received from search sources", ["source"]
+))
+SOURCE_TIMEOUTS = REGISTRY.register(Counter(
+    "past_matters_source_timeouts_total", "Search sources cut off by their timeout", ["source"]
+))
+
+# Round-trip counter of the job running in the current context
+_job_round_trips: ContextVar[Optional[List[int]]] = ContextVar("job_round_trips", default=None)
+
+@contextmanager
+def job_round_trips() -> Iterator[List[int]]:
+    """
+    Count MongoDB round trips made by a job
+
+    Tasks started inside the block inherit the counter, so stages running
+    concurrently add to the same total.
+
+    Yields:
+        A one-item list holding the running count
+    """
+    trips = [0]
+    token = _job_round_trips.set(trips)
+    try:
+        yield trips
+    finally:
+        _job_round_trips.reset(token)
+
+def mongo_round_trip(operation: str, count: int = 1):
+    """Record round trips to MongoDB, attributing them to the current job if any"""
+    MONGO_OPERATIONS.inc(count, operation=operation)
+    trips = _job_round_trips.get()
+    if trips is not None:
+        trips[0] += count
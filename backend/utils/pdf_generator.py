@@ -2,23 +2,68 @@ import logging
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from collections import Counter
+from typing import Dict, Any, List, Optional
 import qrcode
 from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
+# Table styles are immutable once built, so every table shares these
+CASE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#fee2e2')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+CASE_LIST_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#fee2e2')),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+])
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6366f1')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+CASE_LIST_HEADER = ['Case Number', 'Type', 'Filed', 'Status', 'Court', 'Severity']
+CASE_LIST_COL_WIDTHS = [1.2*inch, 1.2*inch, 0.8*inch, 1.1*inch, 1.9*inch, 0.6*inch]
+
 class PDFGenerator:
     """Generate PDF reports for search results"""
     
-    def __init__(self):
+    def __init__(self, large_report_threshold: int = 20, page_budget: int = 25,
+                 rows_per_page: int = 40, chunk_rows: int = 200):
+        """
+        Args:
+            large_report_threshold: Case count above which large-report mode is used
+            page_budget: Pages the case list may fill in large-report mode
+            rows_per_page: Estimated case list rows per page
+            chunk_rows: Rows per table chunk; bounds the cost of splitting tables across pages
+        """
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.large_report_threshold = large_report_threshold
+        self.page_budget = page_budget
+        self.rows_per_page = rows_per_page
+        self.chunk_rows = chunk_rows
     
     def _setup_custom_styles(self):
         """Setup custom paragraph styles"""
@@ -40,6 +85,13 @@ class PDFGenerator:
             spaceAfter=10
         ))
         
+        self.styles.add(ParagraphStyle(
+            name='Warning',
+            parent=self.styles['Normal'],
+            textColor=colors.HexColor('#dc2626'),
+            spaceBefore=6
+        ))
+        
         self.styles.add(ParagraphStyle(
             name='RiskScore',
             parent=self.styles['Normal'],
@@ -49,13 +101,16 @@ class PDFGenerator:
             spaceAfter=10
         ))
     
-    def generate_report(self, result_data: Dict[str, Any], output_path: str) -> str:
+    def generate_report(self, result_data: Dict[str, Any], output_path: str,
+                        large_report: Optional[bool] = None) -> str:
         """
         Generate PDF report from search results
         
         Args:
             result_data: Search result dictionary
             output_path: Path to save PDF
+            large_report: Force large-report mode on or off; by default it is used
+                when the subject has more than large_report_threshold court cases
             
         Returns:
             Path to generated PDF
@@ -101,6 +156,14 @@ class PDFGenerator:
                 f"Confidence Level: {risk_score['confidence_level']}%",
                 self.styles['Normal']
             ))
+            incomplete_sources = result_data.get('incomplete_sources')
+            if incomplete_sources:
+                sources = ", ".join(name.replace("_", " ") for name in incomplete_sources)
+                story.append(Paragraph(
+                    f"<b>Incomplete search:</b> {sources} timed out before finishing. "
+                    f"Records may be missing and the score may understate the risk.",
+                    self.styles['Warning']
+                ))
             story.append(Spacer(1, 0.2*inch))
             
             # Score Breakdown
@@ -132,15 +195,21 @@ class PDFGenerator:
             story.append(Spacer(1, 0.3*inch))
             
             # Court Cases
-            if result_data.get('court_cases'):
+            court_cases = result_data.get('court_cases') or []
+            if large_report is None:
+                large_report = len(court_cases) > self.large_report_threshold
+            appendix = []
+            if court_cases and large_report:
+                appendix = self._build_case_list(story, court_cases)
+            elif court_cases:
                 story.append(Paragraph("Court Records", self.styles['SectionTitle']))
                 story.append(Paragraph(
-                    f"Total Cases Found: {len(result_data['court_cases'])}",
+                    f"Total Cases Found: {len(court_cases)}",
                     self.styles['Normal']
                 ))
                 story.append(Spacer(1, 0.1*inch))
                 
-                for case in result_data['court_cases']:
+                for case in court_cases:
                     case_data = [
                         ['Case Number:', case['case_number']],
                         ['Type:', case['case_type']],
@@ -150,14 +219,7 @@ class PDFGenerator:
                         ['Severity:', f"{case['severity_score']}/10"]
                     ]
                     case_table = Table(case_data, colWidths=[1.5*inch, 4.5*inch])
-                    case_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#fee2e2')),
-                        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-                    ]))
+                    case_table.setStyle(CASE_TABLE_STYLE)
                     story.append(case_table)
                     story.append(Spacer(1, 0.2*inch))
             else:
@@ -184,6 +246,8 @@ class PDFGenerator:
                     story.append(Paragraph(profile_text, self.styles['Normal']))
                     story.append(Spacer(1, 0.15*inch))
             
+            story.extend(appendix)
+            
             # Footer
             story.append(Spacer(1, 0.5*inch))
             story.append(Paragraph(
@@ -201,6 +265,57 @@ class PDFGenerator:
             logger.error(f"Error generating PDF: {str(e)}")
             raise
     
+    def _build_case_list(self, story: List[Any], court_cases: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Add court cases as one paginated list for large reports
+        
+        Rows are emitted in chunks of LongTables that share one style and repeat
+        the header on every page. Cases beyond the page budget are left out of the
+        list and summarized in an appendix.
+        
+        Returns:
+            Appendix flowables to place at the end of the report
+        """
+        max_rows = self.page_budget * self.rows_per_page
+        listed = court_cases[:max_rows]
+        
+        story.append(Paragraph("Court Records", self.styles['SectionTitle']))
+        story.append(Paragraph(
+            f"Total Cases Found: {len(court_cases)}",
+            self.styles['Normal']
+        ))
+        if len(listed) < len(court_cases):
+            story.append(Paragraph(
+                f"Showing the first {len(listed)} cases; the remaining "
+                f"{len(court_cases) - len(listed)} are summarized in the appendix.",
+                self.styles['Normal']
+            ))
+        story.append(Spacer(1, 0.1*inch))
+        
+        for start in range(0, len(listed), self.chunk_rows):
+            rows = [CASE_LIST_HEADER]
+            rows.extend(
+                [case['case_number'], case['case_type'], case['filing_date'],
+                 case['status'], case['court_name'], f"{case['severity_score']}/10"]
+                for case in listed[start:start + self.chunk_rows]
+            )
+            table = LongTable(rows, colWidths=CASE_LIST_COL_WIDTHS, repeatRows=1)
+            table.setStyle(CASE_LIST_STYLE)
+            story.append(table)
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Appendix summary of all cases, by type and by status
+        by_type = Counter(case['case_type'] for case in court_cases)
+        by_status = Counter(case['status'] for case in court_cases)
+        appendix = [PageBreak(), Paragraph("Appendix: Court Records Summary", self.styles['SectionTitle'])]
+        for title, counts in (("Case Type", by_type), ("Status", by_status)):
+            rows = [[title, 'Cases']] + [[key, str(count)] for key, count in counts.most_common()]
+            table = Table(rows, colWidths=[3*inch, 1.5*inch])
+            table.setStyle(SUMMARY_TABLE_STYLE)
+            appendix.append(table)
+            appendix.append(Spacer(1, 0.2*inch))
+        return appendix
+    
     def generate_qr_code(self, data: str) -> BytesIO:
         """Generate QR code for result URL"""
         qr = qrcode.QRCode(
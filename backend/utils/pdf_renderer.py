@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Collection, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# One generator per worker process, built once by the pool initializer
+_generator = None
+
+def _init_worker():
+    global _generator
+    from utils.pdf_generator import PDFGenerator
+    _generator = PDFGenerator()
+
+def _render_report(result: Dict[str, Any], output_path: str) -> str:
+    """Render in a worker process; the file only appears under its final name once complete"""
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    _generator.generate_report(result, tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+class PDFRenderer:
+    """
+    Render PDF reports in a process pool with an on-disk cache
+
+    Reports are cached by the content hash of the serialized result (see
+    CachedResult.digest), so a report is only rendered again when its result
+    changes (e.g. after rescoring). Rendering happens off the event loop in
+    worker processes that each keep a ready PDFGenerator; a pool broken by a
+    crashed worker is replaced and the render retried once.
+
+    The cache is pruned to max_files in a thread, at most every
+    prune_interval seconds after a render. Reports being rendered or served
+    within the last serve_grace seconds are never pruned.
+    """
+
+    def __init__(self, output_dir: Path, workers: int = 2, max_files: int = 1000, prerender: bool = False,
+                 prune_interval: float = 60.0, serve_grace: float = 60.0):
+        self.output_dir = output_dir
+        self.workers = workers
+        self.max_files = max_files
+        self.prerender_enabled = prerender
+        self.prune_interval = prune_interval
+        self.serve_grace = serve_grace
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Digest -> when its report was last handed out
+        self._served: Dict[str, float] = {}
+        self._pruning: Optional[asyncio.Task] = None
+        self._last_prune = float("-inf")
+
+    @classmethod
+    def from_env(cls) -> "PDFRenderer":
+        return cls(
+            Path(os.environ.get('PDF_EXPORT_DIR', '/app/backend/exports')),
+            workers=int(os.environ.get('PDF_RENDER_WORKERS', 2)),
+            max_files=int(os.environ.get('PDF_CACHE_MAX_FILES', 1000)),
+            prerender=os.environ.get('PDF_PRERENDER', '0') == '1'
+        )
+
+    def start(self):
+        if self._executor is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            # Spawned workers don't inherit the event loop's threads and sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def path_for(self, digest: str) -> Path:
+        return self.output_dir / f"report_{digest}.pdf"
+
+    async def render(self, result: Dict[str, Any], digest: str) -> Path:
+        """
+        Get the PDF for a result, rendering it if it isn't cached yet
+
+        Concurrent requests for the same content share one render.
+
+        Args:
+            result: The search result
+            digest: Content hash of the serialized result (CachedResult.digest)
+        """
+        path = self.path_for(digest)
+        if path.exists():
+            self._served[digest] = time.monotonic()
+            return path
+
+        pending = self._pending.get(digest)
+        if pending is None:
+            pending = asyncio.ensure_future(self._run(result, str(path)))
+            self._pending[digest] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(digest, None))
+        await asyncio.shield(pending)
+        self._served[digest] = time.monotonic()
+        self._schedule_prune()
+        return path
+
+    async def _run(self, result: Dict[str, Any], output_path: str) -> str:
+        self.start()
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, _render_report, result, output_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); the pool rejects all work from now on
+            logger.warning("PDF render pool is broken, restarting it")
+            if self._executor is executor:
+                self.stop()
+            self.start()
+            return await loop.run_in_executor(self._executor, _render_report, result, output_path)
+
+    def prerender(self, result: Dict[str, Any], digest: str):
+        """Speculatively render a freshly completed result in the background"""
+        if not self.prerender_enabled:
+            return
+
+        async def run():
+            try:
+                await self.render(result, digest)
+            except Exception as e:
+                logger.error(f"PDF pre-render failed: {str(e)}")
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def discard(self, digest: str):
+        """Remove the cached PDF of a result"""
+        self.path_for(digest).unlink(missing_ok=True)
+
+    def _schedule_prune(self):
+        """Prune in a thread unless a prune is running or ran within prune_interval"""
+        now = time.monotonic()
+        if (self._pruning is not None and not self._pruning.done()) or now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        self._served = {digest: at for digest, at in self._served.items() if now - at < self.serve_grace}
+        keep = set(self._pending) | set(self._served)
+        self._pruning = asyncio.ensure_future(asyncio.to_thread(self._prune, keep))
+
+    def _prune(self, keep: Collection[str]):
+        """Drop the least recently written reports beyond max_files, except those in keep"""
+        try:
+            reports = []
+            with os.scandir(self.output_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith("report_") and entry.name.endswith(".pdf"):
+                        reports.append(entry)
+            excess = len(reports) - self.max_files
+            if excess <= 0:
+                return
+            reports.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in reports:
+                if excess <= 0:
+                    break
+                if entry.name[len("report_"):-len(".pdf")] in keep:
+                    continue
+                Path(entry.path).unlink(missing_ok=True)
+                excess -= 1
+        except OSError as e:
+            logger.warning(f"Pruning PDF cache failed: {str(e)}")
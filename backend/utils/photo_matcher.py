@@ -11,6 +11,9 @@ logger = logging.getLogger(__name__)
 class PhotoMatcher:
     """Handle photo matching and face recognition"""
     
+    # Loaded on first use and shared by every matcher in the process
+    _face_cascade: Optional["cv2.CascadeClassifier"] = None
+    
     def __init__(self):
         self.hash_threshold = 10  # Lower = more similar
         
@@ -47,39 +50,45 @@ class PhotoMatcher:
         percentage = max(0, 100 - (diff * 100 // 64))
         return percentage
     
+    @classmethod
+    def face_cascade(cls) -> "cv2.CascadeClassifier":
+        """The Haar cascade, loaded once per process"""
+        if cls._face_cascade is None:
+            cls._face_cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            )
+        return cls._face_cascade
+    
+    @staticmethod
+    def decode_image(image_path: str, max_dimension: Optional[int] = None):
+        """
+        Decode an image file once into a BGR array
+        
+        Args:
+            image_path: Path of the image
+            max_dimension: Downscale so neither side exceeds this many pixels
+            
+        Returns:
+            The image array (or None if it can't be decoded) and the scale
+            factor that was applied
+        """
+        buffer = np.fromfile(str(image_path), dtype=np.uint8)
+        img = cv2.imdecode(buffer, cv2.IMREAD_COLOR) if buffer.size else None
+        if img is None:
+            return None, 1.0
+        scale = 1.0
+        if max_dimension and max(img.shape[:2]) > max_dimension:
+            scale = max_dimension / max(img.shape[:2])
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return img, scale
+    
     def detect_faces(self, image_path: str) -> List[Dict[str, Any]]:
         """Detect faces in an image using OpenCV"""
         try:
-            # Load the cascade
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            
-            # Read the image
-            img = cv2.imread(str(image_path))
+            img, _ = self.decode_image(image_path)
             if img is None:
                 return []
-            
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Detect faces
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
-            
-            face_data = []
-            for (x, y, w, h) in faces:
-                face_data.append({
-                    'x': int(x),
-                    'y': int(y),
-                    'width': int(w),
-                    'height': int(h),
-                    'confidence': 0.85  # OpenCV doesn't provide confidence
-                })
-            
+            face_data = self.detect_faces_in_array(img)
             logger.info(f"Detected {len(face_data)} faces in {image_path}")
             return face_data
             
@@ -87,41 +96,78 @@ class PhotoMatcher:
             logger.error(f"Error detecting faces: {str(e)}")
             return []
     
-    def extract_face_features(self, image_path: str) -> Optional[Dict[str, Any]]:
-        """Extract face features from an image"""
+    def detect_faces_in_array(self, img: np.ndarray, scale: float = 1.0) -> List[Dict[str, Any]]:
+        """Detect faces in a decoded BGR image; boxes are mapped back through scale"""
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        
+        # Detect faces
+        faces = self.face_cascade().detectMultiScale(
+            gray,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(30, 30)
+        )
+        
+        face_data = []
+        for (x, y, w, h) in faces:
+            face_data.append({
+                'x': int(round(x / scale)),
+                'y': int(round(y / scale)),
+                'width': int(round(w / scale)),
+                'height': int(round(h / scale)),
+                'confidence': 0.85  # OpenCV doesn't provide confidence
+            })
+        return face_data
+    
+    def extract_face_features(self, image_path: str, max_dimension: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Extract face features from an image, decoding it once"""
         try:
-            faces = self.detect_faces(image_path)
-            if not faces:
-                logger.warning(f"No faces detected in {image_path}")
+            img, scale = self.decode_image(image_path, max_dimension)
+            if img is None:
+                logger.warning(f"Could not decode {image_path}")
                 return None
-            
-            # Get the largest face (assuming it's the primary subject)
-            primary_face = max(faces, key=lambda f: f['width'] * f['height'])
-            
-            # Calculate image hash for the face region
-            img = Image.open(image_path)
-            face_img = img.crop((
-                primary_face['x'],
-                primary_face['y'],
-                primary_face['x'] + primary_face['width'],
-                primary_face['y'] + primary_face['height']
-            ))
-            
-            # Calculate hash of face region
-            face_hash = str(imagehash.average_hash(face_img))
-            
-            return {
-                'face_detected': True,
-                'face_count': len(faces),
-                'primary_face': primary_face,
-                'face_hash': face_hash,
-                'full_image_hash': self.calculate_image_hash(image_path)
-            }
+            features = self.extract_features_from_array(img, scale)
+            if not features:
+                logger.warning(f"No faces detected in {image_path}")
+            return features
             
         except Exception as e:
             logger.error(f"Error extracting face features: {str(e)}")
             return None
     
+    def extract_features_from_array(self, img: np.ndarray, scale: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Extract face features from a decoded BGR image
+        
+        Args:
+            img: Image array, possibly downscaled
+            scale: Factor the image was downscaled by; reported boxes are in
+                original pixels
+        """
+        faces = self.detect_faces_in_array(img, scale)
+        if not faces:
+            return None
+        
+        # Get the largest face (assuming it's the primary subject)
+        primary_face = max(faces, key=lambda f: f['width'] * f['height'])
+        
+        # Hash the face region and the whole image from the same decoded pixels
+        rgb = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        face_img = rgb.crop((
+            int(primary_face['x'] * scale),
+            int(primary_face['y'] * scale),
+            int((primary_face['x'] + primary_face['width']) * scale),
+            int((primary_face['y'] + primary_face['height']) * scale)
+        ))
+        
+        return {
+            'face_detected': True,
+            'face_count': len(faces),
+            'primary_face': primary_face,
+            'face_hash': str(imagehash.average_hash(face_img)),
+            'full_image_hash': str(imagehash.average_hash(rgb))
+        }
+    
     def search_by_photo(self, photo_path: str, profile_photos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Search for matching profiles by photo"""
         matches = []
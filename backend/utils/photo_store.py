@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+import aiofiles
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+class PhotoTooLarge(Exception):
+    """Raised when an upload exceeds the photo size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Photo exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+class PhotoStore:
+    """
+    Content-addressed storage of uploaded photos
+
+    Uploads are streamed to disk in chunks while they are hashed, and are
+    abandoned as soon as they pass max_bytes. A photo is stored once under its
+    SHA-256 (uploads/ab/abcdef....jpg), so repeated uploads of the same image
+    share one file, and a `photos` document counts the searches using it; the
+    file is removed when the last of them is deleted.
+    """
+
+    def __init__(self, collection, upload_dir: Path, max_bytes: int = 10 * 1024 * 1024,
+                 chunk_size: int = 256 * 1024):
+        self.collection = collection
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        # Serializes reference changes with the file operations they imply
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls, collection) -> "PhotoStore":
+        return cls(
+            collection,
+            Path(os.environ.get('PHOTO_UPLOAD_DIR', '/app/backend/uploads')),
+            max_bytes=int(os.environ.get('MAX_PHOTO_BYTES', 10 * 1024 * 1024))
+        )
+
+    def path_for(self, digest: str) -> Path:
+        return self.upload_dir / digest[:2] / f"{digest}.jpg"
+
+    async def save(self, upload) -> Dict[str, Any]:
+        """
+        Stream an upload into the store and take a reference to it
+
+        Args:
+            upload: An UploadFile (anything with an async read(size))
+
+        Returns:
+            The photo's sha256, path and size
+
+        Raises:
+            PhotoTooLarge: If the upload exceeds max_bytes
+        """
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.upload_dir / f".upload-{uuid.uuid4().hex}"
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                while chunk := await upload.read(self.chunk_size):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise PhotoTooLarge(self.max_bytes)
+                    hasher.update(chunk)
+                    await f.write(chunk)
+
+            digest = hasher.hexdigest()
+            path = self.path_for(digest)
+            async with self._lock:
+                await self.collection.update_one(
+                    {"_id": digest},
+                    {
+                        "$inc": {"refs": 1},
+                        "$setOnInsert": {
+                            "path": str(path),
+                            "size": size,
+                            "created_at": datetime.now(timezone.utc).isoformat()
+                        }
+                    },
+                    upsert=True
+                )
+                if path.exists():
+                    logger.info(f"Photo {digest[:12]} already stored, reusing it")
+                else:
+                    path.parent.mkdir(exist_ok=True)
+                    os.replace(tmp_path, path)
+            return {"sha256": digest, "path": str(path), "size": size}
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    async def release(self, photo_path: str):
+        """Drop a search's reference to a photo, removing the file with the last one"""
+        digest = Path(photo_path).stem
+        async with self._lock:
+            photo: Optional[Dict[str, Any]] = await self.collection.find_one_and_update(
+                {"_id": digest, "refs": {"$gt": 0}},
+                {"$inc": {"refs": -1}},
+                return_document=ReturnDocument.AFTER
+            )
+            if photo is None:
+                # Photos uploaded before content addressing belong to a single search
+                if not await self.collection.find_one({"_id": digest}, {"_id": 1}):
+                    Path(photo_path).unlink(missing_ok=True)
+                return
+            if photo["refs"] <= 0:
+                deleted = await self.collection.delete_one({"_id": digest, "refs": {"$lte": 0}})
+                if deleted.deleted_count:
+                    Path(photo["path"]).unlink(missing_ok=True)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+class ProgressBus:
+    """
+    In-process pub/sub of job status events
+
+    The worker that runs a job publishes a status snapshot on every progress
+    change; streaming endpoints subscribe per job. Works when the API and the
+    workers run in the same process.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    @classmethod
+    def from_env(cls, collection) -> "ProgressBus":
+        """Pick the bus implementation from PROGRESS_BUS (memory or changestream)"""
+        if os.environ.get('PROGRESS_BUS', 'memory') == 'changestream':
+            return ChangeStreamProgressBus(collection)
+        return cls()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Register interest in a job; events arrive on the returned queue"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: Dict[str, Any]):
+        """Publish a status event for a job"""
+        self._dispatch(job_id, event)
+
+    def _dispatch(self, job_id: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+class ChangeStreamProgressBus(ProgressBus):
+    """
+    Progress bus fed by a MongoDB change stream on the searches collection
+
+    Used when workers and API servers run on different nodes: every node watches
+    the collection and forwards changes to its local subscribers, so local
+    publishes are ignored. Requires MongoDB running as a replica set.
+    """
+
+    def __init__(self, collection):
+        super().__init__()
+        self.collection = collection
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def publish(self, job_id: str, event: Dict[str, Any]):
+        pass
+
+    async def _watch(self):
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["update", "replace"]}}},
+            {"$project": {
+                "fullDocument.id": 1,
+                "fullDocument.status": 1,
+                "fullDocument.progress": 1,
+                "fullDocument.error": 1
+            }}
+        ]
+        while True:
+            try:
+                async with self.collection.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        job = change.get("fullDocument")
+                        if job and job.get("id") in self._subscribers:
+                            self._dispatch(job["id"], status_event(job["id"], job))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress change stream failed, restarting: {str(e)}")
+                await asyncio.sleep(5)
+
+def status_event(job_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the status payload shared by the status endpoint and the event stream"""
+    return {
+        "status": job["status"],
+        "progress": {
+            "overall": job["progress"]["overall"],
+            "stages": job["progress"]["stages"]
+        },
+        "result_url": f"/api/search/{job_id}/result" if job["status"] == "completed" else None,
+        "error": job.get("error")
+    }
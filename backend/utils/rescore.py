@@ -0,0 +1,249 @@
+"""
+Re-score stored search results with the current RiskCalculator
+
+Streams completed results from MongoDB in batches, recomputes their risk
+scores in a process pool and writes changed scores back with bulk writes.
+Progress is checkpointed after every batch, so an interrupted run can be
+resumed with its run id.
+
+Usage (from the backend directory):
+    python -m utils.rescore [--run-id ID] [--batch-size N] [--workers N]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from utils.search_store import SearchStore
+
+logger = logging.getLogger(__name__)
+
+# One calculator per worker process, built once by the pool initializer
+_calculator = None
+
+def _init_worker():
+    global _calculator
+    from utils.risk_calculator import RiskCalculator
+    _calculator = RiskCalculator()
+
+def _score_batch(subjects: List[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+    return _calculator.calculate_risk_batch(subjects)
+
+class ResultRescorer:
+    """
+    Recompute `risk_score` of every stored result
+
+    Inline results in `search_results` (and legacy results still inline in
+    `searches`) are updated in place with `$set`; the few results stored in
+    GridFS are rewritten whole. Scoring of up to `workers` batches overlaps
+    with reading the next batch and writing the previous one.
+    """
+
+    # Phases run in this order; a checkpoint records the phase and last _id
+    PHASES = ("search_results", "legacy", "gridfs")
+
+    def __init__(self, store: SearchStore, checkpoints, batch_size: int = 500, workers: int = 2):
+        self.store = store
+        self.checkpoints = checkpoints
+        self.batch_size = batch_size
+        self.workers = workers
+
+    @classmethod
+    def from_env(cls, store: SearchStore) -> "ResultRescorer":
+        return cls(
+            store,
+            store.db.rescore_checkpoints,
+            batch_size=int(os.environ.get('RESCORE_BATCH_SIZE', 500)),
+            workers=int(os.environ.get('RESCORE_WORKERS', 2))
+        )
+
+    async def get_checkpoint(self, run_id: str) -> Optional[Dict[str, Any]]:
+        return await self.checkpoints.find_one({"_id": run_id})
+
+    async def run(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Re-score all stored results, resuming from the run's checkpoint if it exists
+
+        Args:
+            run_id: Id of the run to resume; a new run is started if omitted
+
+        Returns:
+            The final checkpoint with counts and throughput
+        """
+        run_id = run_id or str(uuid.uuid4())
+        checkpoint = await self.get_checkpoint(run_id)
+        if checkpoint is None:
+            checkpoint = {
+                "_id": run_id,
+                "phase": self.PHASES[0],
+                "last_id": None,
+                "processed": 0,
+                "updated": 0,
+                "completed": False,
+                "started_at": datetime.now(timezone.utc).isoformat()
+            }
+            await self.checkpoints.insert_one(checkpoint)
+        elif checkpoint.get("completed"):
+            return checkpoint
+        else:
+            logger.info(f"Rescore {run_id}: resuming {checkpoint['phase']} after {checkpoint['last_id']}")
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        started = time.monotonic()
+        processed_before = checkpoint["processed"]
+        try:
+            for phase in self.PHASES[self.PHASES.index(checkpoint["phase"]):]:
+                if phase != checkpoint["phase"]:
+                    checkpoint.update({"phase": phase, "last_id": None})
+                    await self._save_checkpoint(checkpoint)
+                if phase == "gridfs":
+                    await self._rescore_gridfs(checkpoint, executor, started, processed_before)
+                else:
+                    collection, query, path = self._inline_source(phase)
+                    await self._rescore_inline(checkpoint, executor, collection, query, path,
+                                               started, processed_before)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        checkpoint["completed"] = True
+        checkpoint["completed_at"] = datetime.now(timezone.utc).isoformat()
+        await self._save_checkpoint(checkpoint)
+        logger.info(f"Rescore {run_id}: done, {checkpoint['processed']} results scored, "
+                    f"{checkpoint['updated']} updated ({checkpoint.get('docs_per_sec', 0)} docs/sec)")
+        return checkpoint
+
+    def _inline_source(self, phase: str):
+        """Collection, filter and result path of an inline phase"""
+        if phase == "search_results":
+            return self.store.results, {"result": {"$ne": None}}, "result"
+        # Jobs stored before results were split out keep them inline
+        return self.store.jobs, {"status": "completed", "result": {"$ne": None}}, "result"
+
+    async def _rescore_inline(self, checkpoint: Dict[str, Any], executor: ProcessPoolExecutor,
+                              collection, query: Dict[str, Any], path: str,
+                              started: float, processed_before: int):
+        if checkpoint["last_id"] is not None:
+            query = {**query, "_id": {"$gt": checkpoint["last_id"]}}
+        projection = {
+            f"{path}.court_cases": 1,
+            f"{path}.social_profiles": 1,
+            f"{path}.incomplete_sources": 1,
+            f"{path}.risk_score": 1
+        }
+        cursor = collection.find(query, projection).sort("_id", 1).batch_size(self.batch_size)
+
+        loop = asyncio.get_running_loop()
+        pending: Deque[Tuple[List[Dict[str, Any]], asyncio.Future]] = deque()
+
+        async def flush_oldest():
+            docs, scoring = pending.popleft()
+            scores = await scoring
+            # Only while the score is the one read: a result saved since then keeps its own score
+            requests = [
+                UpdateOne({"_id": doc["_id"], f"{path}.risk_score": doc[path].get("risk_score")},
+                          {"$set": {f"{path}.risk_score": score}})
+                for doc, score in zip(docs, scores)
+                if doc[path].get("risk_score") != score
+            ]
+            updated = 0
+            if requests:
+                updated = (await collection.bulk_write(requests, ordered=False)).modified_count
+            # Batches complete in cursor order, so the checkpoint only moves forward
+            checkpoint["last_id"] = docs[-1]["_id"]
+            checkpoint["processed"] += len(docs)
+            checkpoint["updated"] += updated
+            self._record_throughput(checkpoint, started, processed_before)
+            await self._save_checkpoint(checkpoint)
+
+        batch: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) < self.batch_size:
+                continue
+            pending.append((batch, loop.run_in_executor(executor, _score_batch, _subjects(batch, path))))
+            batch = []
+            if len(pending) > self.workers:
+                await flush_oldest()
+        if batch:
+            pending.append((batch, loop.run_in_executor(executor, _score_batch, _subjects(batch, path))))
+        while pending:
+            await flush_oldest()
+
+    async def _rescore_gridfs(self, checkpoint: Dict[str, Any], executor: ProcessPoolExecutor,
+                              started: float, processed_before: int):
+        """Rewrite results too large to keep inline; there are few, so one at a time"""
+        query: Dict[str, Any] = {"gridfs_id": {"$exists": True}}
+        if checkpoint["last_id"] is not None:
+            query["_id"] = {"$gt": checkpoint["last_id"]}
+        loop = asyncio.get_running_loop()
+        async for doc in self.store.results.find(query, {"id": 1}).sort("_id", 1):
+            result = await self.store.get_result(doc["id"])
+            if result is not None:
+                [score] = await loop.run_in_executor(executor, _score_batch, _subjects([{"result": result}], "result"))
+                if result.get("risk_score") != score:
+                    result["risk_score"] = score
+                    await self.store.save_result(doc["id"], result)
+                    checkpoint["updated"] += 1
+            checkpoint["last_id"] = doc["_id"]
+            checkpoint["processed"] += 1
+            self._record_throughput(checkpoint, started, processed_before)
+            await self._save_checkpoint(checkpoint)
+
+    @staticmethod
+    def _record_throughput(checkpoint: Dict[str, Any], started: float, processed_before: int):
+        elapsed = time.monotonic() - started
+        rate = (checkpoint["processed"] - processed_before) / elapsed if elapsed > 0 else 0.0
+        checkpoint["docs_per_sec"] = round(rate, 1)
+        logger.info(f"Rescore {checkpoint['_id']}: {checkpoint['phase']} {checkpoint['processed']} scored, "
+                    f"{checkpoint['updated']} updated, {checkpoint['docs_per_sec']} docs/sec")
+
+    async def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        checkpoint["updated_at"] = datetime.now(timezone.utc).isoformat()
+        await self.checkpoints.replace_one({"_id": checkpoint["_id"]}, checkpoint, upsert=True)
+
+def _subjects(docs: List[Dict[str, Any]], path: str) -> List[Tuple[Any, ...]]:
+    return [
+        (doc[path].get("court_cases") or [], doc[path].get("social_profiles") or [],
+         doc[path].get("incomplete_sources") or [])
+        for doc in docs
+    ]
+
+async def main():
+    parser = argparse.ArgumentParser(description="Re-score stored search results")
+    parser.add_argument("--run-id", help="Resume the run with this id")
+    parser.add_argument("--batch-size", type=int, help="Results per batch")
+    parser.add_argument("--workers", type=int, help="Scoring processes")
+    args = parser.parse_args()
+
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        rescorer = ResultRescorer.from_env(SearchStore.from_env(client[os.environ['DB_NAME']]))
+        if args.batch_size:
+            rescorer.batch_size = args.batch_size
+        if args.workers:
+            rescorer.workers = args.workers
+        checkpoint = await rescorer.run(args.run_id)
+        print(f"Run {checkpoint['_id']}: {checkpoint['processed']} results scored, "
+              f"{checkpoint['updated']} updated, {checkpoint.get('docs_per_sec', 0)} docs/sec")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+class CachedResult:
+    """A completed search result with its serialized body and ETag"""
+
+    def __init__(self, result: Dict[str, Any], body: bytes, expires_at: float):
+        self.result = result
+        self.body = body
+        # Content hash of the body; also keys the result's cached PDF report
+        self.digest = body_digest(body)
+        self.etag = f'"{self.digest[:32]}"'
+        self.expires_at = expires_at
+        # Derived views built on first use, e.g. the paginated timeline
+        self.timeline = None
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache of completed search results
+
+    Completed results don't change unless they are rescored or deleted, which
+    invalidate their entry; the TTL bounds staleness for changes made by other
+    processes. Timeline indexes of results that aren't cached whole (e.g.
+    results over max_bytes) are kept separately, up to max_timelines.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300.0,
+                 max_timelines: int = 32):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_timelines = max_timelines
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._timelines: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            max_entries=int(os.environ.get('RESULT_CACHE_ENTRIES', 256)),
+            max_bytes=int(os.environ.get('RESULT_CACHE_BYTES', 64 * 1024 * 1024)),
+            ttl=float(os.environ.get('RESULT_CACHE_TTL', 300)),
+            max_timelines=int(os.environ.get('RESULT_CACHE_TIMELINES', 32))
+        )
+
+    def get(self, job_id: str) -> Optional[CachedResult]:
+        entry = self._entries.get(job_id)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self.invalidate(job_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(job_id)
+        self.hits += 1
+        return entry
+
+    def put(self, job_id: str, result: Dict[str, Any]) -> CachedResult:
+        """Serialize a result and cache it, evicting least recently used entries"""
+        entry = CachedResult(result, serialize_result(result), time.monotonic() + self.ttl)
+        self.invalidate(job_id)
+        if len(entry.body) > self.max_bytes:
+            return entry
+        self._entries[job_id] = entry
+        self._bytes += len(entry.body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+        return entry
+
+    def get_timeline(self, job_id: str) -> Optional[Any]:
+        """Get the timeline index of a result that isn't cached whole"""
+        entry = self._timelines.get(job_id)
+        if entry is None or entry[1] < time.monotonic():
+            self._timelines.pop(job_id, None)
+            return None
+        self._timelines.move_to_end(job_id)
+        return entry[0]
+
+    def put_timeline(self, job_id: str, timeline: Any) -> Any:
+        self._timelines[job_id] = (timeline, time.monotonic() + self.ttl)
+        self._timelines.move_to_end(job_id)
+        while len(self._timelines) > self.max_timelines:
+            self._timelines.popitem(last=False)
+        return timeline
+
+    def invalidate(self, job_id: str):
+        entry = self._entries.pop(job_id, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+        self._timelines.pop(job_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._timelines.clear()
+        self._bytes = 0
+
+def serialize_result(result: Dict[str, Any]) -> bytes:
+    """Encode a result the way API responses are encoded"""
+    return dumps(result)
+
+def body_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+def result_digest(result: Dict[str, Any]) -> str:
+    """Content hash of a result, as CachedResult.digest computes it"""
+    return body_digest(serialize_result(result))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
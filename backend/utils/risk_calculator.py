@@ -1,12 +1,26 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence, Tuple
+from utils.risk_rules import DATING_PLATFORMS, MATRIMONIAL_PLATFORMS, NO_FACTORS, SERIOUS_CASE_TYPES, RuleEngine
 
 logger = logging.getLogger(__name__)
 
 class RiskCalculator:
-    """Calculate risk scores based on court cases and social profiles"""
+    """
+    Calculate risk scores based on court cases and social profiles
     
-    def __init__(self):
+    Scores are computed in one pass over the cases and one over the profiles.
+    The rules are also declared as data in utils.risk_rules; with rule_timing
+    the calculator evaluates those tables instead, which counts calls, hits
+    and time per rule at the cost of speed. Both paths give the same scores.
+    """
+    
+    def __init__(self, rule_timing: bool = False):
+        """
+        Args:
+            rule_timing: Evaluate with a private rule engine that counts calls,
+                hits and time per rule (see rule_stats)
+        """
+        self.rules = RuleEngine(timed=True) if rule_timing else None
         self.weights = {
             "legal": 0.40,
             "relationship": 0.35,
@@ -14,21 +28,27 @@ class RiskCalculator:
         }
     
     def calculate_risk(self, court_cases: List[Dict[str, Any]], 
-                      social_profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+                      social_profiles: List[Dict[str, Any]],
+                      incomplete_sources: Sequence[str] = ()) -> Dict[str, Any]:
         """
         Calculate comprehensive risk score
         
         Args:
             court_cases: List of court case records
             social_profiles: List of social/matrimonial/dating profiles
+            incomplete_sources: Sources cut off before they finished; the
+                score may understate the risk, which the result states
             
         Returns:
             Dictionary with risk score details
         """
-        # Calculate individual scores
-        legal_score = self._calculate_legal_score(court_cases)
-        relationship_score = self._calculate_relationship_score(social_profiles)
-        social_behavior_score = self._calculate_social_behavior_score(social_profiles)
+        # Calculate individual scores and contributing factors
+        if self.rules is not None:
+            (legal_score, relationship_score, social_behavior_score), contributing_factors, _ = \
+                self.rules.evaluate(court_cases, social_profiles)
+        else:
+            legal_score, relationship_score, social_behavior_score, contributing_factors = \
+                self._score(court_cases, social_profiles)
         
         # Calculate weighted overall score
         overall_score = (
@@ -40,15 +60,10 @@ class RiskCalculator:
         # Determine risk category
         risk_category = self._get_risk_category(overall_score)
         
-        # Get contributing factors
-        contributing_factors = self._get_contributing_factors(
-            court_cases, social_profiles, legal_score, relationship_score, social_behavior_score
-        )
-        
         # Calculate confidence level
         confidence = self._calculate_confidence(court_cases, social_profiles)
         
-        return {
+        risk = {
             "overall_score": int(overall_score),
             "risk_category": risk_category,
             "breakdown": {
@@ -59,84 +74,100 @@ class RiskCalculator:
             "contributing_factors": contributing_factors,
             "confidence_level": confidence
         }
+        if incomplete_sources:
+            # A low score from partial records must not read as a clean subject
+            sources = ", ".join(name.replace("_", " ") for name in incomplete_sources)
+            if contributing_factors == [NO_FACTORS]:
+                contributing_factors.clear()
+            contributing_factors.insert(0, f"Incomplete search: {sources} timed out, risk may be understated")
+            risk["incomplete_sources"] = list(incomplete_sources)
+        return risk
     
-    def _calculate_legal_score(self, court_cases: List[Dict[str, Any]]) -> float:
-        """Calculate score based on legal records (0-100 scale)"""
-        if not court_cases:
-            return 0
+    def calculate_risk_batch(self, subjects: Sequence[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        """
+        Calculate risk scores for many subjects
         
-        score = 0
+        Args:
+            subjects: (court_cases, social_profiles) or (court_cases,
+                social_profiles, incomplete_sources) tuples, one per subject
+            
+        Returns:
+            Risk score dictionaries in the order of subjects
+        """
+        return [self.calculate_risk(*subject) for subject in subjects]
+    
+    def rule_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Calls, hits and seconds per rule; empty unless rule_timing is on"""
+        return self.rules.rule_stats() if self.rules is not None else {}
+    
+    def _score(self, court_cases: List[Dict[str, Any]],
+               social_profiles: List[Dict[str, Any]]) -> Tuple[float, float, float, List[str]]:
+        """
+        Legal, relationship and social behavior scores (0-100 each) and contributing factors
         
+        Mirrors CASE_RULES, PROFILE_RULES, SUBJECT_RULES and FACTOR_RULES in
+        utils.risk_rules; change both together.
+        """
+        # Legal score and case counts
+        legal_score = 0
+        pending_cases = 0
+        serious_cases = 0
         for case in court_cases:
             case_type = case.get("case_type", "")
-            status = case.get("status", "")
-            severity = case.get("severity_score", 5)
-            
-            # Add base severity
-            score += severity * 2
-            
-            # Pending cases get extra points
-            if status.lower() == "pending":
-                score += 3
-            
-            # High severity cases
-            if case_type in ["Criminal", "Domestic Violence"]:
-                score += 10
+            legal_score += case.get("severity_score", 5) * 2
+            if case.get("status", "").lower() == "pending":
+                legal_score += 3
+                pending_cases += 1
+            if case_type in SERIOUS_CASE_TYPES:
+                legal_score += 10
+                serious_cases += 1
             elif case_type == "Matrimonial":
-                score += 5
+                legal_score += 5
         
-        return min(score, 100)
-    
-    def _calculate_relationship_score(self, social_profiles: List[Dict[str, Any]]) -> float:
-        """Calculate score based on relationship patterns (0-100 scale)"""
-        if not social_profiles:
-            return 0
-        
-        score = 0
+        # Profile counts
         total_changes = 0
-        
+        matrimonial_profiles = 0
+        dating_profiles = 0
+        frequently_edited = 0
+        platforms = set()
         for profile in social_profiles:
-            changes = profile.get("relationship_status_history", [])
-            total_changes += len(changes)
-        
-        # Multiple relationship status changes
+            platform = profile["platform"]
+            platforms.add(platform)
+            total_changes += len(profile.get("relationship_status_history", []))
+            if platform in MATRIMONIAL_PLATFORMS:
+                matrimonial_profiles += 1
+            elif platform in DATING_PLATFORMS:
+                dating_profiles += 1
+            if profile.get("activity_pattern", {}).get("profile_changes", 0) > 6:
+                frequently_edited += 1
+        
+        relationship_score = 0
         if total_changes > 3:
-            score += (total_changes - 3) * 5
-        
-        # Multiple active profiles
-        matrimonial_profiles = [p for p in social_profiles if p["platform"] in ["Shaadi", "Bharatmatrimony", "Jeevansathi"]]
-        dating_profiles = [p for p in social_profiles if p["platform"] in ["Tinder", "Bumble", "Hinge", "TrulyMadly", "QuackQuack"]]
-        
-        if len(matrimonial_profiles) > 1:
-            score += 10
-        
-        if len(dating_profiles) > 2:
-            score += 15
+            relationship_score += (total_changes - 3) * 5
+        if matrimonial_profiles > 1:
+            relationship_score += 10
+        if dating_profiles > 2:
+            relationship_score += 15
         
-        return min(score, 100)
-    
-    def _calculate_social_behavior_score(self, social_profiles: List[Dict[str, Any]]) -> float:
-        """Calculate score based on social media behavior (0-100 scale)"""
-        if not social_profiles:
-            return 0
-        
-        score = 0
-        
-        # Check for inconsistencies across platforms
-        platforms_count = len(set(p["platform"] for p in social_profiles))
-        
-        if platforms_count > 5:
-            score += 10
+        social_behavior_score = frequently_edited * 5
+        if len(platforms) > 5:
+            social_behavior_score += 10
         
-        # Check activity patterns
-        for profile in social_profiles:
-            activity = profile.get("activity_pattern", {})
-            
-            # Inactive profiles
-            if activity.get("profile_changes", 0) > 6:
-                score += 5
+        factors = []
+        if pending_cases:
+            factors.append(f"{pending_cases} pending court case(s)")
+        if serious_cases:
+            factors.append(f"{serious_cases} serious criminal/domestic violence case(s)")
+        if total_changes > 3:
+            factors.append(f"Multiple relationship status changes ({total_changes} recorded)")
+        if matrimonial_profiles > 1:
+            factors.append(f"Active on {matrimonial_profiles} matrimonial platforms")
+        if len(social_profiles) > 5:
+            factors.append(f"Presence on {len(social_profiles)} different platforms")
+        if not factors:
+            factors.append(NO_FACTORS)
         
-        return min(score, 100)
+        return min(legal_score, 100), min(relationship_score, 100), min(social_behavior_score, 100), factors
     
     def _get_risk_category(self, score: float) -> str:
         """Determine risk category based on score"""
@@ -149,41 +180,6 @@ class RiskCalculator:
         else:
             return "critical"
     
-    def _get_contributing_factors(self, court_cases: List[Dict[str, Any]], 
-                                 social_profiles: List[Dict[str, Any]],
-                                 legal_score: float, relationship_score: float,
-                                 social_behavior_score: float) -> List[str]:
-        """Get list of contributing factors to risk score"""
-        factors = []
-        
-        # Legal factors
-        if court_cases:
-            pending_cases = [c for c in court_cases if c.get("status", "").lower() == "pending"]
-            if pending_cases:
-                factors.append(f"{len(pending_cases)} pending court case(s)")
-            
-            criminal_cases = [c for c in court_cases if c.get("case_type") in ["Criminal", "Domestic Violence"]]
-            if criminal_cases:
-                factors.append(f"{len(criminal_cases)} serious criminal/domestic violence case(s)")
-        
-        # Relationship factors
-        total_changes = sum(len(p.get("relationship_status_history", [])) for p in social_profiles)
-        if total_changes > 3:
-            factors.append(f"Multiple relationship status changes ({total_changes} recorded)")
-        
-        matrimonial_count = len([p for p in social_profiles if p["platform"] in ["Shaadi", "Bharatmatrimony", "Jeevansathi"]])
-        if matrimonial_count > 1:
-            factors.append(f"Active on {matrimonial_count} matrimonial platforms")
-        
-        # Social behavior factors
-        if len(social_profiles) > 5:
-            factors.append(f"Presence on {len(social_profiles)} different platforms")
-        
-        if not factors:
-            factors.append("Limited public information available")
-        
-        return factors
-    
     def _calculate_confidence(self, court_cases: List[Dict[str, Any]], 
                             social_profiles: List[Dict[str, Any]]) -> int:
         """Calculate confidence level in the assessment (0-100)"""
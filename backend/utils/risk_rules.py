@@ -0,0 +1,303 @@
+"""
+Declarative risk scoring and contributing-factor rules
+
+The tables below state the rules RiskCalculator scores with. Its default path
+is a hand-written single pass over cases and profiles that mirrors them; a
+RuleEngine evaluates the tables themselves, which is slower but can count
+calls, hits and time per rule (RiskCalculator(rule_timing=True)).
+
+The engine walks a subject's court cases and profiles a single time. Record
+rules score each case or profile as it is visited and count their hits;
+profile metrics are summed in the same pass. Subject and factor rules then
+only read those aggregates, so adding a rule never adds another scan over the
+records.
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+MATRIMONIAL_PLATFORMS = frozenset({"Shaadi", "Bharatmatrimony", "Jeevansathi"})
+DATING_PLATFORMS = frozenset({"Tinder", "Bumble", "Hinge", "TrulyMadly", "QuackQuack"})
+SERIOUS_CASE_TYPES = frozenset({"Criminal", "Domestic Violence"})
+
+COMPONENTS = ("legal", "relationship", "social_behavior")
+
+Points = Union[int, float, Callable[[Any], Union[int, float]]]
+
+class RecordRule:
+    """
+    A condition on one field of a court case or profile
+
+    Matching records add points to a score component, or are only counted
+    when component is None. Conditions are data rather than code, so adjacent
+    rules on the same field share a single read of it per record.
+
+    Args:
+        name: Rule name; its hit count is available to subject and factor rules
+        component: Score component the points go to, or None
+        field: Record key the rule reads
+        values: Match when the field's value is in this set
+        above: Match when the field's value is greater than this
+        points: Points per match, or a function of the field's value
+        default: Value used when the record lacks the field
+        parent: Key of a nested dict holding the field
+        lower: Lower-case the value before matching
+    """
+
+    def __init__(self, name: str, component: Optional[str], field: str,
+                 values: Optional[frozenset] = None, above: Optional[float] = None,
+                 points: Points = 0, default: Any = None, parent: Optional[str] = None,
+                 lower: bool = False):
+        self.name = name
+        self.component = component
+        self.field = field
+        self.values = values
+        self.above = above
+        self.points = points
+        self.default = default
+        self.parent = parent
+        self.lower = lower
+
+class SubjectRule:
+    """Points added once per subject, decided from the aggregates of its records"""
+
+    def __init__(self, name: str, component: str, when: Callable[[Dict[str, Any]], bool], points: Points):
+        self.name = name
+        self.component = component
+        self.when = when
+        self.points = points
+
+class FactorRule:
+    """A contributing factor reported when the subject's aggregates match"""
+
+    def __init__(self, name: str, when: Callable[[Dict[str, Any]], bool], message: Callable[[Dict[str, Any]], str]):
+        self.name = name
+        self.when = when
+        self.message = message
+
+# Per-case legal points, added in this order for every case
+CASE_RULES = (
+    RecordRule("case_severity", "legal", "severity_score", default=5, points=lambda severity: severity * 2),
+    RecordRule("pending_case", "legal", "status", values=frozenset({"pending"}), points=3, default="", lower=True),
+    RecordRule("serious_case", "legal", "case_type", values=SERIOUS_CASE_TYPES, points=10, default=""),
+    RecordRule("matrimonial_case", "legal", "case_type", values=frozenset({"Matrimonial"}), points=5, default=""),
+)
+
+PROFILE_RULES = (
+    RecordRule("matrimonial_profiles", None, "platform", values=MATRIMONIAL_PLATFORMS),
+    RecordRule("dating_profiles", None, "platform", values=DATING_PLATFORMS),
+    RecordRule("frequently_edited_profile", "social_behavior", "profile_changes", parent="activity_pattern",
+               above=6, points=5, default=0),
+)
+
+# Summed over profiles in the same pass
+PROFILE_METRICS = (
+    ("status_changes", lambda profile: len(profile.get("relationship_status_history", []))),
+)
+
+SUBJECT_RULES = (
+    SubjectRule("status_changes", "relationship", when=lambda agg: agg["status_changes"] > 3,
+                points=lambda agg: (agg["status_changes"] - 3) * 5),
+    SubjectRule("multiple_matrimonial", "relationship", when=lambda agg: agg["matrimonial_profiles"] > 1, points=10),
+    SubjectRule("multiple_dating", "relationship", when=lambda agg: agg["dating_profiles"] > 2, points=15),
+    SubjectRule("many_platforms", "social_behavior", when=lambda agg: agg["platforms"] > 5, points=10),
+)
+
+FACTOR_RULES = (
+    FactorRule("pending_cases", when=lambda agg: agg["pending_case"] > 0,
+               message=lambda agg: f"{agg['pending_case']} pending court case(s)"),
+    FactorRule("serious_cases", when=lambda agg: agg["serious_case"] > 0,
+               message=lambda agg: f"{agg['serious_case']} serious criminal/domestic violence case(s)"),
+    FactorRule("status_changes", when=lambda agg: agg["status_changes"] > 3,
+               message=lambda agg: f"Multiple relationship status changes ({agg['status_changes']} recorded)"),
+    FactorRule("matrimonial_platforms", when=lambda agg: agg["matrimonial_profiles"] > 1,
+               message=lambda agg: f"Active on {agg['matrimonial_profiles']} matrimonial platforms"),
+    FactorRule("profile_count", when=lambda agg: agg["profiles"] > 5,
+               message=lambda agg: f"Presence on {agg['profiles']} different platforms"),
+)
+
+NO_FACTORS = "Limited public information available"
+
+class RuleStats:
+    """Evaluation counters of one rule"""
+
+    __slots__ = ("calls", "hits", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "hits": self.hits, "seconds": round(self.seconds, 6)}
+
+# A record rule resolved for evaluation:
+# (hit index, values, above, component index or None, points, whether points is a function)
+Check = Tuple[int, Optional[frozenset], Optional[float], Optional[int], Points, bool]
+
+# Adjacent rules reading the same field: (parent, field, default, lower, checks)
+FieldGroup = Tuple[Optional[str], str, Any, bool, Tuple[Check, ...]]
+
+class RuleEngine:
+    """
+    Single-pass evaluator built from declarative rules
+
+    The record rules are grouped once so that adjacent rules on the same field
+    share one read of it per record; membership rules are frozenset lookups.
+    Evaluation loops over a subject's cases and then its profiles a single
+    time. With timed=True the engine also keeps calls, hits and time spent
+    per rule; untimed engines skip that cost.
+    """
+
+    def __init__(self, case_rules: Sequence[RecordRule] = CASE_RULES,
+                 profile_rules: Sequence[RecordRule] = PROFILE_RULES,
+                 profile_metrics: Sequence[Tuple[str, Callable[[Dict[str, Any]], Any]]] = PROFILE_METRICS,
+                 subject_rules: Sequence[SubjectRule] = SUBJECT_RULES,
+                 factor_rules: Sequence[FactorRule] = FACTOR_RULES,
+                 timed: bool = False):
+        self.timed = timed
+        self.stats: Dict[str, RuleStats] = {}
+        # Every record rule's hit count is an aggregate that later rules can read
+        self._hit_names = [rule.name for rule in case_rules] + [rule.name for rule in profile_rules]
+        self._metric_names = [name for name, _ in profile_metrics]
+        self._profile_metrics = [metric for _, metric in profile_metrics]
+        # Counters of the record rules by hit index, when timed
+        self._check_stats: List[RuleStats] = []
+        self._case_groups = self._group("case", case_rules, 0)
+        self._profile_groups = self._group("profile", profile_rules, len(case_rules))
+        self._subject_rules = [
+            (COMPONENTS.index(rule.component), self._timed(f"subject.{rule.name}", rule.when), rule.points)
+            for rule in subject_rules
+        ]
+        self._factor_rules = [
+            (self._timed(f"factor.{rule.name}", rule.when), rule.message) for rule in factor_rules
+        ]
+
+    def _group(self, scope: str, rules: Sequence[RecordRule], first: int) -> List[FieldGroup]:
+        """Group adjacent rules that read the same field, keeping their order"""
+        groups: List[FieldGroup] = []
+        for offset, rule in enumerate(rules):
+            if self.timed:
+                stats = self.stats[f"{scope}.{rule.name}"] = RuleStats()
+                self._check_stats.append(stats)
+            check = (
+                first + offset,
+                frozenset(rule.values) if rule.values is not None else None,
+                rule.above,
+                COMPONENTS.index(rule.component) if rule.component is not None else None,
+                rule.points,
+                callable(rule.points)
+            )
+            key = (rule.parent, rule.field, rule.default, rule.lower)
+            if groups and groups[-1][:4] == key:
+                groups[-1] = (*key, groups[-1][4] + (check,))
+            else:
+                groups.append((*key, (check,)))
+        return groups
+
+    def _evaluate_records(self, court_cases: List[Dict[str, Any]],
+                          social_profiles: List[Dict[str, Any]]) -> Tuple[List[Any], Dict[str, Any]]:
+        """Score every record and collect the aggregates in one pass over cases and profiles"""
+        apply = self._apply_timed if self.timed else self._apply
+        scores: List[Any] = [0, 0, 0]
+        hits = [0] * len(self._hit_names)
+        for case in court_cases:
+            apply(case, self._case_groups, scores, hits)
+
+        profile_metrics = self._profile_metrics
+        metrics = [0] * len(profile_metrics)
+        platforms = set()
+        for profile in social_profiles:
+            platforms.add(profile['platform'])
+            for j, metric in enumerate(profile_metrics):
+                metrics[j] += metric(profile)
+            apply(profile, self._profile_groups, scores, hits)
+
+        aggregates = {
+            "cases": len(court_cases),
+            "profiles": len(social_profiles),
+            "platforms": len(platforms)
+        }
+        aggregates.update(zip(self._hit_names, hits))
+        aggregates.update(zip(self._metric_names, metrics))
+        return scores, aggregates
+
+    @staticmethod
+    def _apply(record: Dict[str, Any], groups: List[FieldGroup], scores: List[Any], hits: List[int]):
+        """Run the record rules on one record, adding to the scores and hit counts"""
+        for parent, field, default, lower, checks in groups:
+            # One read of the field for all adjacent rules on it
+            value = (record if parent is None else record.get(parent, {})).get(field, default)
+            if lower:
+                value = value.lower()
+            for hit, values, above, component, points, points_from_value in checks:
+                if values is not None:
+                    if value not in values:
+                        continue
+                elif above is not None and not value > above:
+                    continue
+                hits[hit] += 1
+                if component is not None:
+                    scores[component] += points(value) if points_from_value else points
+
+    def _apply_timed(self, record: Dict[str, Any], groups: List[FieldGroup], scores: List[Any], hits: List[int]):
+        """Like _apply, also counting calls, hits and time per rule"""
+        perf_counter = time.perf_counter
+        for parent, field, default, lower, checks in groups:
+            value = (record if parent is None else record.get(parent, {})).get(field, default)
+            if lower:
+                value = value.lower()
+            for hit, values, above, component, points, points_from_value in checks:
+                start = perf_counter()
+                stats = self._check_stats[hit]
+                stats.calls += 1
+                if values is not None:
+                    matched = value in values
+                else:
+                    matched = above is None or value > above
+                if matched:
+                    hits[hit] += 1
+                    stats.hits += 1
+                    if component is not None:
+                        scores[component] += points(value) if points_from_value else points
+                stats.seconds += perf_counter() - start
+
+    def _timed(self, key: str, when: Callable[[Any], bool]) -> Callable[[Any], bool]:
+        if not self.timed:
+            return when
+        stats = self.stats[key] = RuleStats()
+        perf_counter = time.perf_counter
+
+        def timed_when(value) -> bool:
+            start = perf_counter()
+            matched = when(value)
+            stats.seconds += perf_counter() - start
+            stats.calls += 1
+            if matched:
+                stats.hits += 1
+            return matched
+
+        return timed_when
+
+    def evaluate(self, court_cases: List[Dict[str, Any]],
+                 social_profiles: List[Dict[str, Any]]) -> Tuple[List[Any], List[str], Dict[str, Any]]:
+        """
+        Score a subject in one pass over its records
+
+        Returns:
+            Component scores in COMPONENTS order (capped at 100), contributing
+            factors and the aggregates the rules were evaluated on
+        """
+        scores, aggregates = self._evaluate_records(court_cases, social_profiles)
+        for component, when, points in self._subject_rules:
+            if when(aggregates):
+                scores[component] += points(aggregates) if callable(points) else points
+
+        factors = [message(aggregates) for when, message in self._factor_rules if when(aggregates)]
+        if not factors:
+            factors.append(NO_FACTORS)
+
+        return [min(score, 100) for score in scores], factors, aggregates
+
+    def rule_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per rule (empty unless the engine is timed)"""
+        return {key: stats.to_dict() for key, stats in self.stats.items()}
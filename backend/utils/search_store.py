@@ -0,0 +1,241 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+import bson
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import ASCENDING, ReturnDocument
+from utils.metrics import mongo_round_trip
+
+logger = logging.getLogger(__name__)
+
+class SearchStore:
+    """
+    MongoDB storage for search jobs
+
+    Hot job state (input, status, progress, lease) lives in the small documents
+    of the `searches` collection, which every status poll, progress tick and
+    queue claim touches. Finished results go to `search_results`, or to GridFS
+    when they are too large to keep inline, so the hot path never reads them.
+    """
+
+    STATUS_PROJECTION = {"_id": 0, "status": 1, "progress": 1, "error": 1}
+
+    def __init__(self, db, inline_limit: int = 8 * 1024 * 1024):
+        self.db = db
+        self.jobs = db.searches
+        self.results = db.search_results
+        self.inline_limit = inline_limit
+        self._gridfs: Optional[AsyncIOMotorGridFSBucket] = None
+
+    @classmethod
+    def from_env(cls, db) -> "SearchStore":
+        return cls(db, inline_limit=int(os.environ.get('RESULT_INLINE_LIMIT', 8 * 1024 * 1024)))
+
+    @property
+    def gridfs(self) -> AsyncIOMotorGridFSBucket:
+        """GridFS bucket for oversized results, created on first use"""
+        if self._gridfs is None:
+            self._gridfs = AsyncIOMotorGridFSBucket(self.db, bucket_name="search_results")
+        return self._gridfs
+
+    async def ensure_indexes(self):
+        """Create the indexes the API and job queue rely on"""
+        await self.jobs.create_index([("id", ASCENDING)], unique=True, name="id_unique")
+        await self.jobs.create_index([("status", ASCENDING), ("created_at", ASCENDING)], name="queue_claim")
+        await self.results.create_index([("id", ASCENDING)], unique=True, name="id_unique")
+        logger.info("Search store indexes ensured")
+
+    async def create_job(self, job_data: Dict[str, Any]):
+        mongo_round_trip("create_job")
+        await self.jobs.insert_one(job_data)
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get status, progress and error of a job without touching its result"""
+        mongo_round_trip("get_status")
+        return await self.jobs.find_one({"id": job_id}, self.STATUS_PROJECTION)
+
+    async def get_job(self, job_id: str, fields: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Get the hot job document, optionally restricted to the given fields"""
+        projection = {"_id": 0, **(fields or {})}
+        mongo_round_trip("get_job")
+        return await self.jobs.find_one({"id": job_id}, projection)
+
+    async def update_progress(self, job_id: str, stage: str, progress: int) -> Optional[Dict[str, Any]]:
+        """
+        Set a stage's progress and recompute the overall percentage atomically
+
+        Returns:
+            The updated status and progress, or None if the job is missing or terminal
+        """
+        mongo_round_trip("update_progress")
+        return await self.jobs.find_one_and_update(
+            {"id": job_id, "status": {"$nin": ["completed", "failed"]}},
+            [
+                {"$set": {f"progress.stages.{stage}": {"$literal": progress}}},
+                {"$set": {"progress.overall": {"$let": {
+                    "vars": {"stages": {"$objectToArray": "$progress.stages"}},
+                    "in": {"$toInt": {"$floor": {"$divide": [
+                        {"$sum": "$$stages.v"},
+                        {"$max": [{"$size": "$$stages"}, 1]}
+                    ]}}}
+                }}}}
+            ],
+            projection=self.STATUS_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def complete(self, job_id: str, result: Dict[str, Any],
+                       fields: Optional[Dict[str, Any]] = None,
+                       worker_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Store the result, then mark the job completed
+
+        The result is written first so a completed job always has one.
+
+        Args:
+            worker_id: The queue worker that claimed the job; if given, nothing
+                is written unless that worker still holds it
+
+        Returns:
+            The final status and progress of the job, or None if it wasn't updated
+        """
+        claim = self._claim_filter(job_id, worker_id)
+        if worker_id is not None:
+            # A worker whose lease expired must not replace the result of the job's new owner
+            mongo_round_trip("check_claim")
+            if not await self.jobs.find_one(claim, {"_id": 1}):
+                return None
+        await self.save_result(job_id, result)
+        mongo_round_trip("complete")
+        return await self.jobs.find_one_and_update(
+            claim,
+            {"$set": {"status": "completed", **(fields or {})}},
+            projection=self.STATUS_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Mark a job failed
+
+        Args:
+            worker_id: The queue worker that claimed the job; if given, the job
+                is only updated while that worker still holds it
+
+        Returns:
+            The final status and progress of the job, or None if it wasn't updated
+        """
+        mongo_round_trip("fail")
+        return await self.jobs.find_one_and_update(
+            self._claim_filter(job_id, worker_id),
+            {"$set": {"status": "failed", "error": error}},
+            projection=self.STATUS_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def _claim_filter(job_id: str, worker_id: Optional[str]) -> Dict[str, Any]:
+        if worker_id is None:
+            return {"id": job_id}
+        return {"id": job_id, "worker_id": worker_id, "status": "processing"}
+
+    async def save_result(self, job_id: str, result: Dict[str, Any]):
+        """Store a result inline, or in GridFS when it exceeds the inline limit"""
+        encoded = bson.encode(result)
+        doc: Dict[str, Any] = {"id": job_id, "size": len(encoded)}
+        if len(encoded) > self.inline_limit:
+            mongo_round_trip("gridfs_upload")
+            doc["gridfs_id"] = await self.gridfs.upload_from_stream(
+                f"{job_id}.bson", encoded, metadata={"job_id": job_id}
+            )
+            logger.info(f"Job {job_id}: stored {len(encoded)} byte result in GridFS")
+        else:
+            doc["result"] = result
+        mongo_round_trip("save_result")
+        previous = await self.results.find_one_and_replace(
+            {"id": job_id}, doc, projection={"_id": 0, "gridfs_id": 1}, upsert=True
+        )
+        if previous and previous.get("gridfs_id"):
+            mongo_round_trip("gridfs_delete")
+            await self.gridfs.delete(previous["gridfs_id"])
+
+    async def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a stored result, or None if the job has none"""
+        mongo_round_trip("get_result")
+        doc = await self.results.find_one({"id": job_id}, {"_id": 0})
+        if doc is None:
+            # Jobs stored before results were split out keep them inline
+            mongo_round_trip("get_result")
+            legacy = await self.jobs.find_one({"id": job_id, "result": {"$ne": None}}, {"_id": 0, "result": 1})
+            return legacy["result"] if legacy else None
+        if doc.get("gridfs_id"):
+            mongo_round_trip("gridfs_download")
+            stream = await self.gridfs.open_download_stream(doc["gridfs_id"])
+            return bson.decode(await stream.read())
+        return doc.get("result")
+
+    async def get_result_fields(self, job_id: str, fields: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Load only the given top-level fields of a stored result
+
+        The projection runs in MongoDB for inline results; results in GridFS
+        are loaded whole and projected here.
+
+        Returns:
+            The requested fields present in the result, or None if the job has none
+        """
+        projection = {f"result.{field}": 1 for field in fields}
+        result, _ = await self._find_result(job_id, projection)
+        if result is None:
+            return None
+        return {field: result[field] for field in fields if field in result}
+
+    async def get_result_slice(self, job_id: str, field: str, skip: int, limit: int) -> Optional[List[Any]]:
+        """
+        Load a slice of an array field of a stored result
+
+        Returns:
+            Up to limit items starting at skip, or None if the job has no result
+        """
+        projection = {f"result.{field}": {"$slice": [skip, limit]}}
+        result, whole = await self._find_result(job_id, projection)
+        if result is None:
+            return None
+        items = result.get(field) or []
+        return items[skip:skip + limit] if whole else items
+
+    async def _find_result(self, job_id: str, projection: Dict[str, Any]):
+        """
+        Find a result with a projection on its `result.*` paths
+
+        Returns:
+            The (projected) result or None, and whether it is the whole result
+            because it came from GridFS
+        """
+        mongo_round_trip("find_result")
+        doc = await self.results.find_one({"id": job_id}, {"_id": 0, "gridfs_id": 1, **projection})
+        if doc is None:
+            # Jobs stored before results were split out keep them inline
+            mongo_round_trip("find_result")
+            doc = await self.jobs.find_one({"id": job_id, "result": {"$ne": None}}, {"_id": 0, "id": 1, **projection})
+            return (doc.get("result", {}) if doc else None), False
+        if doc.get("gridfs_id"):
+            mongo_round_trip("gridfs_download")
+            stream = await self.gridfs.open_download_stream(doc["gridfs_id"])
+            return bson.decode(await stream.read()), True
+        return doc.get("result", {}), False
+
+    async def delete_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Delete a job and its stored result
+
+        Returns:
+            The deleted job's input, or None if the job did not exist
+        """
+        mongo_round_trip("delete_job", 2)
+        job = await self.jobs.find_one_and_delete({"id": job_id}, projection={"_id": 0, "input": 1})
+        result = await self.results.find_one_and_delete({"id": job_id}, projection={"_id": 0, "gridfs_id": 1})
+        if result and result.get("gridfs_id"):
+            mongo_round_trip("gridfs_delete")
+            await self.gridfs.delete(result["gridfs_id"])
+        return job
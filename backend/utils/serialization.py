@@ -0,0 +1,40 @@
+import json
+import logging
+from typing import Any
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact UTF-8 JSON, with orjson when it is installed
+
+    Both encoders write the same JSON for the data the API returns; only
+    float exponents are spelled differently (1e16 vs 1e+16), and orjson
+    writes NaN as null where the stdlib refuses it. Content orjson rejects,
+    such as integers beyond 64 bits or non-string keys, goes through the
+    stdlib.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            pass
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fast encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
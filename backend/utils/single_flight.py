@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import re
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent iterations into one execution
+
+    The first caller for a key starts the iteration; callers arriving with the
+    same key while it is in flight receive the same items. Items are shared,
+    so callers must treat them as read-only.
+    """
+
+    def __init__(self):
+        self._streams: Dict[Hashable, "_SharedStream"] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def stream(self, key: Hashable, func: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Coalesce identical concurrent iterations into one
+
+        The first caller starts iterating and every caller receives all items,
+        those produced before it joined first, then the rest as they arrive.
+        The iteration is cancelled once all callers have stopped consuming it.
+        """
+        shared = self._streams.get(key)
+        if shared is None or shared.task.done():
+            shared = _SharedStream(func())
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda _: self._forget_stream(key, shared))
+            self.executions += 1
+        else:
+            self.shared += 1
+            logger.info(f"Joining in-flight stream for {key[0] if isinstance(key, tuple) else key}")
+        async for item in shared.subscribe():
+            yield item
+
+    def _forget_stream(self, key: Hashable, shared: "_SharedStream"):
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+class _SharedStream:
+    """An async iterator consumed once in a task, with its items replayed to every subscriber"""
+
+    def __init__(self, iterator: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.get_running_loop().create_future()
+        self.task = asyncio.create_task(self._consume(iterator))
+
+    async def _consume(self, iterator: AsyncIterator[Any]):
+        try:
+            async for item in iterator:
+                self.items.append(item)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.get_running_loop().create_future()
+        changed.set_result(None)
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        self.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(self.items):
+                    yield self.items[position]
+                    position += 1
+                if self.task.done():
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await asyncio.shield(self._changed)
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.task.done():
+                self.task.cancel()
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+def search_key(input_data: Dict[str, Any]) -> Tuple[str, ...]:
+    """Normalized identity of a search query; equal keys return the same sources"""
+    return (
+        _normalize(input_data.get("name")),
+        (input_data.get("dob") or "").strip(),
+        _normalize(input_data.get("state")),
+        _normalize(input_data.get("email")),
+        re.sub(r"\D", "", input_data.get("phone") or ""),
+        input_data.get("photo_path") or "",
+        input_data.get("search_type") or ""
+    )
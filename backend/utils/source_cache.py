@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from pymongo import ASCENDING
+from utils.metrics import mongo_round_trip
+
+logger = logging.getLogger(__name__)
+
+class SourceFreshness:
+    """How long a source's cached results are fresh, and how long they may be served stale"""
+
+    def __init__(self, fresh_seconds: float, stale_seconds: float, empty_seconds: float):
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.empty_seconds = empty_seconds
+
+class SourceCache:
+    """
+    Two-tier cache of per-source lookups with stale-while-revalidate
+
+    Entries live in a small in-memory LRU in front of a MongoDB collection
+    whose TTL index drops them once they are too old to serve. A fresh entry is
+    returned as is; a stale one is returned immediately while a background
+    refresh replaces it. Empty results are kept for a shorter time, since
+    scrapers also return nothing when a site fails.
+    """
+
+    def __init__(self, collection, freshness: Dict[str, SourceFreshness], memory_entries: int = 1024):
+        self.collection = collection
+        self.freshness = freshness
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, collection, sources: Iterable[str]) -> "SourceCache":
+        """
+        Build a cache for the given sources
+
+        Freshness per source comes from SOURCE_CACHE_<SOURCE>_FRESH and
+        SOURCE_CACHE_<SOURCE>_STALE (seconds); SOURCE_CACHE_EMPTY_SECONDS caps
+        how long empty results are considered fresh.
+        """
+        empty_seconds = float(os.environ.get('SOURCE_CACHE_EMPTY_SECONDS', 600))
+        freshness = {}
+        for source in sources:
+            prefix = f"SOURCE_CACHE_{source.upper()}"
+            freshness[source] = SourceFreshness(
+                fresh_seconds=float(os.environ.get(f"{prefix}_FRESH", 6 * 3600)),
+                stale_seconds=float(os.environ.get(f"{prefix}_STALE", 7 * 24 * 3600)),
+                empty_seconds=empty_seconds
+            )
+        return cls(collection, freshness, memory_entries=int(os.environ.get('SOURCE_CACHE_MEMORY_ENTRIES', 1024)))
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl")
+
+    async def get_or_fetch(self, source: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a source's cached result for a normalized query key, fetching on a miss
+
+        Args:
+            source: Source name, e.g. "court_cases"
+            key: Normalized query key
+            fetch: Coroutine factory performing the real lookup
+
+        Returns:
+            The cached or freshly fetched result (shared; treat as read-only)
+        """
+        cache_key = f"{source}:{key}"
+        entry = self._memory.get(cache_key)
+        if entry is None:
+            entry = await self._load(cache_key)
+
+        now = time.time()
+        if entry is not None and now < entry[2]:
+            value, fresh_until, _ = entry
+            self._memory.move_to_end(cache_key)
+            if now < fresh_until:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._revalidate(source, cache_key, fetch)
+            return value
+
+        self.misses += 1
+        value = await fetch()
+        await self._store(source, cache_key, value)
+        return value
+
+    async def _load(self, cache_key: str) -> Optional[Tuple[Any, float, float]]:
+        try:
+            mongo_round_trip("source_cache_load")
+            doc = await self.collection.find_one({"_id": cache_key})
+        except Exception as e:
+            logger.error(f"Source cache read failed for {cache_key}: {str(e)}")
+            return None
+        if not doc:
+            return None
+        entry = (doc["value"], _timestamp(doc["fresh_until"]), _timestamp(doc["expires_at"]))
+        self._remember(cache_key, entry)
+        return entry
+
+    async def _store(self, source: str, cache_key: str, value: Any):
+        freshness = self.freshness[source]
+        fresh_seconds = freshness.fresh_seconds if value else min(freshness.fresh_seconds, freshness.empty_seconds)
+        now = time.time()
+        entry = (value, now + fresh_seconds, now + fresh_seconds + freshness.stale_seconds)
+        self._remember(cache_key, entry)
+        try:
+            mongo_round_trip("source_cache_store")
+            await self.collection.replace_one(
+                {"_id": cache_key},
+                {
+                    "source": source,
+                    "value": value,
+                    "fresh_until": datetime.fromtimestamp(entry[1], timezone.utc),
+                    "expires_at": datetime.fromtimestamp(entry[2], timezone.utc)
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Source cache write failed for {cache_key}: {str(e)}")
+
+    def _remember(self, cache_key: str, entry: Tuple[Any, float, float]):
+        self._memory[cache_key] = entry
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _revalidate(self, source: str, cache_key: str, fetch: Callable[[], Awaitable[Any]]):
+        """Refresh a stale entry in the background, once per key at a time"""
+        if cache_key in self._refreshing:
+            return
+        self._refreshing.add(cache_key)
+
+        async def refresh():
+            try:
+                await self._store(source, cache_key, await fetch())
+            except Exception as e:
+                logger.error(f"Background refresh of {cache_key} failed: {str(e)}")
+            finally:
+                self._refreshing.discard(cache_key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+def _timestamp(value: datetime) -> float:
+    # MongoDB returns naive UTC datetimes unless the client is tz_aware
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def query_key(*parts: Optional[str]) -> str:
+    """Normalize query parts (case, whitespace) into a cache key"""
+    return "|".join(" ".join((part or "").split()).casefold() for part in parts)
@@ -0,0 +1,230 @@
+"""
+Pluggable search sources
+
+A search source produces the records of one pipeline stage as an async
+iterator, so records reach the pipeline as they are found instead of when the
+whole source finishes. Each source declares what it depends on, how many
+browser contexts it holds while running and how long it may take. The search
+pipeline is built from a SourceRegistry, so a new source is added by
+registering it rather than by editing the orchestrator.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, TypeVar
+from utils.source_cache import SourceCache, query_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SearchContext:
+    """What a source sees of the search it runs in"""
+
+    def __init__(self, job_id: str, input_data: Dict[str, Any], tools: Dict[str, Any],
+                 results: Dict[str, Any]):
+        self.job_id = job_id
+        self.input = input_data
+        # Scrapers and analyzers built by the server's source factory
+        self.tools = tools
+        # Results of the stages completed so far, keyed by stage name
+        self.results = results
+
+    @property
+    def search_name(self) -> str:
+        """The subject's name, taken from the photo matches of photo-only searches"""
+        search_name = self.input.get("name") or "Unknown"
+        photo_search_results = self.results.get("reverse_image_search")
+        if self.input.get("search_type") == "photo_only" and photo_search_results:
+            # Try to extract name from photo search results
+            if photo_search_results['social_media']:
+                search_name = photo_search_results['social_media'][0].get('profile_name', 'Unknown')
+        return search_name
+
+class SearchSource(ABC):
+    """
+    Base of the search sources
+
+    Subclasses set the metadata below and implement records().
+
+    Attributes:
+        name: Stage name, also the key of the source's result
+        description: What the source does, for the job log
+        depends_on: Sources whose results this source reads
+        cost: Browser contexts held while running; 0 if none
+        timeout: Seconds after which the source is cut off and its records so far are kept
+        single: The source yields one value, the stage result, instead of a list of records
+        record_type: "court_case" or "profile" for sources feeding the risk score
+        photo_matches: Key of the reverse image search matches to add to this source's profiles
+    """
+
+    name: str = ""
+    description: str = ""
+    depends_on: Iterable[str] = ()
+    cost: int = 0
+    timeout: Optional[float] = None
+    single: bool = False
+    record_type: Optional[str] = None
+    photo_matches: Optional[str] = None
+
+    def enabled(self, input_data: Dict[str, Any]) -> bool:
+        """Whether the source runs for this search; disabled sources yield nothing"""
+        return True
+
+    @abstractmethod
+    def records(self, search: SearchContext) -> AsyncIterator[Any]:
+        """Yield the source's records as they are found"""
+
+class SourceRegistry:
+    """Search sources in registration order, which is also a valid dependency order"""
+
+    def __init__(self):
+        self._sources: Dict[str, SearchSource] = {}
+
+    def register(self, source: SearchSource) -> SearchSource:
+        """Add a source; its dependencies must already be registered"""
+        if not source.name:
+            raise ValueError(f"{type(source).__name__} has no name")
+        if source.name in self._sources:
+            raise ValueError(f"Source {source.name} is already registered")
+        for dep in source.depends_on:
+            if dep not in self._sources:
+                raise ValueError(f"Source {source.name} depends on unknown source {dep}")
+        self._sources[source.name] = source
+        return source
+
+    def get(self, name: str) -> Optional[SearchSource]:
+        return self._sources.get(name)
+
+    def __iter__(self) -> Iterator[SearchSource]:
+        return iter(list(self._sources.values()))
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+async def until_deadline(records: AsyncIterator[T], timeout: Optional[float]) -> AsyncIterator[T]:
+    """
+    Yield records until the iterator ends or timeout seconds have passed
+
+    Raises:
+        asyncio.TimeoutError: When the deadline passes; records yielded so far stay with the caller
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+    try:
+        while True:
+            remaining = deadline - loop.time() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                record = await asyncio.wait_for(records.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                return
+            yield record
+    finally:
+        await records.aclose()
+
+def photo_match_profile(match: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    """Profile record for a reverse image search match of the given kind"""
+    if kind == "social_media":
+        return {
+            'platform': match['platform'],
+            'profile_url': match['profile_url'],
+            'created_date': match.get('last_updated'),
+            'relationship_status_history': [],
+            'activity_pattern': {
+                'photo_match_confidence': match['match_confidence'],
+                'photo_count': match.get('photo_count', 0)
+            },
+            'photo_matched': True
+        }
+    return {
+        'platform': match['platform'],
+        'profile_url': match['profile_url'],
+        'created_date': None,
+        'relationship_status_history': [],
+        'activity_pattern': {
+            'photo_match_confidence': match['match_confidence'],
+            'profile_active': match.get('profile_active', False),
+            'photo_matches': match.get('photo_matches', 0)
+        },
+        'photo_matched': True
+    }
+
+class PhotoAnalysisSource(SearchSource):
+    name = "photo_analysis"
+    description = "Analyzing photo"
+    single = True
+
+    def enabled(self, input_data: Dict[str, Any]) -> bool:
+        return bool(input_data.get("photo_path"))
+
+    async def records(self, search: SearchContext) -> AsyncIterator[Any]:
+        yield await search.tools["photo_analyzer"].analyze(search.input["photo_path"])
+
+class ReverseImageSearchSource(SearchSource):
+    name = "reverse_image_search"
+    description = "Performing reverse image search"
+    depends_on = ("photo_analysis",)
+    cost = 1
+    timeout = 300
+    single = True
+
+    def enabled(self, input_data: Dict[str, Any]) -> bool:
+        return bool(input_data.get("photo_path")) and input_data.get("search_type") == "photo_only"
+
+    async def records(self, search: SearchContext) -> AsyncIterator[Any]:
+        yield await search.tools["image_search"].comprehensive_photo_search(search.input["photo_path"])
+
+class CourtCasesSource(SearchSource):
+    name = "court_cases"
+    description = "Scraping court cases"
+    cost = 1
+    timeout = 180
+    record_type = "court_case"
+
+    def __init__(self, source_cache: SourceCache):
+        self.source_cache = source_cache
+
+    def enabled(self, input_data: Dict[str, Any]) -> bool:
+        return bool(input_data.get("name"))
+
+    async def records(self, search: SearchContext) -> AsyncIterator[Any]:
+        # Cached as a whole, so cases arrive together once the lookup finishes
+        name, state = search.input["name"], search.input.get("state")
+        cases = await self.source_cache.get_or_fetch(
+            self.name, query_key(name, state), lambda: search.tools["court"].scrape(name, state)
+        )
+        for case in cases:
+            yield case
+
+class ProfileSource(SearchSource):
+    """Profiles streamed by a scraper tool, searched by the subject's name and email"""
+
+    depends_on = ("reverse_image_search",)
+    timeout = 240
+    record_type = "profile"
+
+    def __init__(self, name: str, tool: str, description: str, cost: int = 1,
+                 photo_matches: Optional[str] = None):
+        self.name = name
+        self.tool = tool
+        self.description = description
+        self.cost = cost
+        self.photo_matches = photo_matches
+
+    def records(self, search: SearchContext) -> AsyncIterator[Any]:
+        return search.tools[self.tool].stream(search.search_name, search.input.get("email"))
+
+def default_registry(source_cache: SourceCache) -> SourceRegistry:
+    """The built-in sources, in the order their records appear in results"""
+    registry = SourceRegistry()
+    registry.register(PhotoAnalysisSource())
+    registry.register(ReverseImageSearchSource())
+    registry.register(CourtCasesSource(source_cache))
+    registry.register(ProfileSource("matrimonial_profiles", "matrimonial", "Scraping matrimonial profiles"))
+    registry.register(ProfileSource("dating_profiles", "dating", "Scraping dating profiles", cost=0,
+                                    photo_matches="dating_apps"))
+    registry.register(ProfileSource("social_media", "social", "Scraping social media",
+                                    photo_matches="social_media"))
+    return registry
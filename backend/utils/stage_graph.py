@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.metrics import STAGE_OUTCOMES, STAGE_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class Stage:
+    """A named unit of pipeline work with its dependencies"""
+
+    def __init__(self, name: str, func: StageFunc, depends_on: Iterable[str] = (),
+                 limit: Optional[int] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.limit = limit
+
+class StageGraph:
+    """
+    Run pipeline stages concurrently as soon as their dependencies finish
+
+    Each stage function receives a dict with the results of the stages completed
+    so far (keyed by stage name) and returns its own result. Stages declared with
+    a limit share a process-wide semaphore per stage name, so at most `limit`
+    instances of that stage run at once across all jobs.
+    """
+
+    _semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._started_at = 0.0
+
+    def add(self, name: str, func: StageFunc, depends_on: Iterable[str] = (),
+            limit: Optional[int] = None) -> "StageGraph":
+        """Register a stage; dependencies must already be registered"""
+        if name in self.stages:
+            raise ValueError(f"Stage {name} is already registered")
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self.stages[name] = Stage(name, func, depends_on, limit)
+        return self
+
+    @classmethod
+    def _semaphore(cls, stage: Stage) -> Optional[asyncio.Semaphore]:
+        if not stage.limit:
+            return None
+        if stage.name not in cls._semaphores:
+            cls._semaphores[stage.name] = asyncio.Semaphore(stage.limit)
+        return cls._semaphores[stage.name]
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Execute all stages
+
+        Returns:
+            Dictionary of stage name to stage result
+
+        Raises:
+            The first exception raised by any stage; the remaining stages are cancelled
+        """
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        self._started_at = time.perf_counter()
+
+        async def run_stage(stage: Stage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            ready = time.perf_counter()
+            semaphore = self._semaphore(stage)
+            if semaphore:
+                await semaphore.acquire()
+            outcome = "error"
+            try:
+                start = time.perf_counter()
+                with timed(STAGE_SECONDS, stage=stage.name):
+                    results[stage.name] = await stage.func(results)
+                outcome = "ok"
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            finally:
+                STAGE_OUTCOMES.inc(stage=stage.name, outcome=outcome)
+                if semaphore:
+                    semaphore.release()
+            end = time.perf_counter()
+            self.timings[stage.name] = {
+                "ready": ready - self._started_at,
+                "start": start - self._started_at,
+                "end": end - self._started_at
+            }
+
+        # Stages are registered after their dependencies, so insertion order is topological
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return results
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        Get the chain of stages that determined end-to-end latency
+
+        Walks back from the last stage to finish, always following the dependency
+        that finished last.
+
+        Returns:
+            Tuple of (stage names in execution order, path duration in milliseconds)
+        """
+        if not self.timings:
+            return [], 0.0
+
+        current = max(self.timings, key=lambda name: self.timings[name]["end"])
+        total = self.timings[current]["end"]
+        path = [current]
+        while self.stages[current].depends_on:
+            current = max(self.stages[current].depends_on, key=lambda name: self.timings[name]["end"])
+            path.append(current)
+        path.reverse()
+        return path, round(total * 1000, 1)
+
+    def summary(self) -> Dict[str, Any]:
+        """Get stage durations and the critical path for storing with the job"""
+        path, total_ms = self.critical_path()
+        return {
+            "stages": {
+                name: {
+                    "duration_ms": round((t["end"] - t["start"]) * 1000, 1),
+                    "wait_ms": round((t["start"] - t["ready"]) * 1000, 1)
+                }
+                for name, t in self.timings.items()
+            },
+            "critical_path": path,
+            "critical_path_ms": total_ms
+        }
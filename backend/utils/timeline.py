@@ -0,0 +1,146 @@
+import base64
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+class RelationshipTimeline:
+    """
+    Relationship status changes of all profiles, newest first
+
+    Dates are parsed once into integer keys and each profile's history is
+    sorted on its own; events are then produced by lazily k-way merging the
+    histories, so reading a page only touches the events on it. The order
+    matches a stable descending sort of the flattened events by date string:
+    ties keep profile order, then history order.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]]):
+        self.profiles = [p for p in profiles if "relationship_status_history" in p]
+        histories = [p["relationship_status_history"] for p in self.profiles]
+        self._keys = _date_keys([change.get("date") for history in histories for change in history])
+        self._order: Optional[List[List[Tuple[int, int]]]] = None
+        self.total = len(self._keys)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def events(self, cursor: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield events newest first, starting after the event the cursor points at"""
+        for _, profile_idx, entry_idx in self._merge(cursor):
+            yield self._event(profile_idx, entry_idx)
+
+    def page(self, cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get up to limit events after the cursor
+
+        Returns:
+            The events and the cursor of the next page, or None after the last page
+        """
+        positions = list(islice(self._merge(cursor), limit + 1))
+        events = [self._event(profile_idx, entry_idx) for _, profile_idx, entry_idx in positions[:limit]]
+        next_cursor = None
+        if len(positions) > limit:
+            _, profile_idx, entry_idx = positions[limit - 1]
+            next_cursor = encode_cursor(profile_idx, entry_idx)
+        return events, next_cursor
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """All events; a full read skips the heap and sorts the flattened events once"""
+        events = [
+            {
+                "date": change.get("date"),
+                "previous_status": change.get("previous_status"),
+                "new_status": change.get("new_status"),
+                "platform": profile["platform"]
+            }
+            for profile in self.profiles
+            for change in profile["relationship_status_history"]
+        ]
+        # Stable, so same-date events keep profile and history order
+        order = sorted(range(len(events)), key=self._keys.__getitem__, reverse=True)
+        return [events[i] for i in order]
+
+    def _profile_order(self) -> List[List[Tuple[int, int]]]:
+        """Per profile: (-date key, history index) in timeline order, built on first use"""
+        if self._order is None:
+            self._order = []
+            position = 0
+            for profile in self.profiles:
+                count = len(profile["relationship_status_history"])
+                self._order.append(sorted((-self._keys[position + i], i) for i in range(count)))
+                position += count
+        return self._order
+
+    def _event(self, profile_idx: int, entry_idx: int) -> Dict[str, Any]:
+        profile = self.profiles[profile_idx]
+        change = profile["relationship_status_history"][entry_idx]
+        return {
+            "date": change.get("date"),
+            "previous_status": change.get("previous_status"),
+            "new_status": change.get("new_status"),
+            "platform": profile["platform"]
+        }
+
+    def _merge(self, cursor: Optional[str]) -> Iterator[Tuple[int, int, int]]:
+        orders = self._profile_order()
+        starts = self._starts(decode_cursor(cursor)) if cursor else [0] * len(orders)
+        return heapq.merge(*(
+            _positions(profile_idx, order, start)
+            for profile_idx, (order, start) in enumerate(zip(orders, starts))
+        ))
+
+    def _starts(self, position: Tuple[int, int]) -> List[int]:
+        """Index of the first event after the cursor's event in every profile's history"""
+        cursor_profile, cursor_entry = position
+        orders = self._profile_order()
+        if not (0 <= cursor_profile < len(orders)):
+            raise ValueError("Cursor does not belong to this timeline")
+        order = orders[cursor_profile]
+        try:
+            neg_key = next(k for k, i in order if i == cursor_entry)
+        except StopIteration:
+            raise ValueError("Cursor does not belong to this timeline")
+
+        starts = []
+        for profile_idx, order in enumerate(orders):
+            if profile_idx < cursor_profile:
+                # Same-date events of earlier profiles were already returned
+                starts.append(bisect_right(order, (neg_key, len(order))))
+            elif profile_idx == cursor_profile:
+                starts.append(bisect_right(order, (neg_key, cursor_entry)))
+            else:
+                starts.append(bisect_left(order, (neg_key, -1)))
+        return starts
+
+def _positions(profile_idx: int, order: List[Tuple[int, int]], start: int) -> Iterator[Tuple[int, int, int]]:
+    for neg_key, entry_idx in islice(order, start, None):
+        yield neg_key, profile_idx, entry_idx
+
+def _date_keys(dates: List[Optional[str]]) -> List[int]:
+    """
+    Integer keys ordering like the date strings (missing dates sort as "")
+
+    ISO dates become YYYYMMDD; if any date has another format, keys are the
+    ranks of the distinct strings instead.
+    """
+    texts = [date or "" for date in dates]
+    if all(not text or ISO_DATE.fullmatch(text) for text in texts):
+        return [int(text.replace("-", "")) if text else 0 for text in texts]
+    ranks = {text: rank for rank, text in enumerate(sorted(set(texts)))}
+    return [ranks[text] for text in texts]
+
+def encode_cursor(profile_idx: int, entry_idx: int) -> str:
+    return base64.urlsafe_b64encode(f"{profile_idx}:{entry_idx}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Decode a page cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        profile_idx, entry_idx = base64.urlsafe_b64decode(padded).decode().split(":")
+        return int(profile_idx), int(entry_idx)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
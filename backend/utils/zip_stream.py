@@ -0,0 +1,65 @@
+import io
+import time
+import zipfile
+from typing import List
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable sink collecting bytes until they are drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class ZipStreamWriter:
+    """
+    Build a ZIP archive incrementally without buffering it
+
+    Every call returns the archive bytes produced so far, ready to be sent to
+    the client. Entries are written with data descriptors since the output
+    can't be seeked back to patch sizes. PDFs are already compressed, so
+    entries are stored by default.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_STORED):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=compression)
+        self._entry = None
+
+    def open_entry(self, arcname: str) -> bytes:
+        info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        info.compress_type = self._zip.compression
+        self._entry = self._zip.open(info, "w")
+        return self._sink.drain()
+
+    def write(self, data: bytes) -> bytes:
+        self._entry.write(data)
+        return self._sink.drain()
+
+    def close_entry(self) -> bytes:
+        self._entry.close()
+        self._entry = None
+        return self._sink.drain()
+
+    def add_bytes(self, arcname: str, data: bytes) -> bytes:
+        return self.open_entry(arcname) + self.write(data) + self.close_entry()
+
+    def close(self) -> bytes:
+        """Write the central directory and return the final bytes"""
+        self._zip.close()
+        return self._sink.drain()
@@ -23,23 +23,54 @@ const ResultsPage = () => {
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    checkStatus();
-    const interval = setInterval(checkStatus, 3000);
-    return () => clearInterval(interval);
+    let interval = null;
+    const startPolling = () => {
+      checkStatus();
+      interval = setInterval(checkStatus, 3000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return () => clearInterval(interval);
+    }
+
+    // Progress is pushed by the server; fall back to polling if the stream can't be opened
+    const source = new EventSource(`${API}/search/${jobId}/events`);
+    source.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.status === 'completed' || data.status === 'failed') {
+        source.close();
+      }
+      handleStatus(data);
+    };
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && !interval) {
+        startPolling();
+      }
+    };
+
+    return () => {
+      source.close();
+      if (interval) clearInterval(interval);
+    };
   }, [jobId]);
 
+  const handleStatus = async (data) => {
+    setStatus(data.status);
+    setProgress(data.progress);
+
+    if (data.status === 'completed') {
+      await fetchResults();
+    } else if (data.status === 'failed') {
+      setError(data.error || 'Search failed');
+      setLoading(false);
+    }
+  };
+
   const checkStatus = async () => {
     try {
       const response = await axios.get(`${API}/search/${jobId}/status`);
-      setStatus(response.data.status);
-      setProgress(response.data.progress);
-
-      if (response.data.status === 'completed') {
-        await fetchResults();
-      } else if (response.data.status === 'failed') {
-        setError(response.data.error || 'Search failed');
-        setLoading(false);
-      }
+      await handleStatus(response.data);
     } catch (err) {
       console.error('Status check error:', err);
       setError('Failed to check status');
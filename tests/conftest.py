@@ -0,0 +1,17 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other from the backend directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # The Motor client connects lazily, so the app imports without a database
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost:27017")
+    monkeypatch.setenv("DB_NAME", "test")
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    return importlib.import_module("server")
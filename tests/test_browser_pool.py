@@ -0,0 +1,101 @@
+import asyncio
+
+from utils.browser_pool import BrowserPool
+
+
+class FakeBrowser:
+    def __init__(self, pool_state):
+        self.state = pool_state
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+        self.state["open"] -= 1
+
+
+class FakePlaywright:
+    """Launches fake browsers slowly and tracks how many are open at once"""
+
+    def __init__(self, launch_seconds=0.01):
+        self.state = {"open": 0, "max_open": 0}
+        self.launch_seconds = launch_seconds
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        await asyncio.sleep(self.launch_seconds)
+        self.state["open"] += 1
+        self.state["max_open"] = max(self.state["max_open"], self.state["open"])
+        return FakeBrowser(self.state)
+
+    async def stop(self):
+        pass
+
+
+async def started_pool(playwright, **kwargs):
+    pool = BrowserPool(**kwargs)
+    pool._playwright = playwright
+    for _ in range(pool.size):
+        pool._browsers.append(await pool._launch())
+    return pool
+
+
+async def lease(pool, hold=0.001):
+    pooled = await pool._acquire()
+    await asyncio.sleep(hold)
+    await pool._release(pooled)
+
+
+def test_pool_never_grows_past_size_while_browsers_retire():
+    async def scenario():
+        playwright = FakePlaywright()
+        pool = await started_pool(playwright, size=2, max_uses=3)
+        await asyncio.gather(*(lease(pool) for _ in range(60)))
+        assert playwright.state["max_open"] == 2
+        assert len(pool._browsers) == 2
+        assert pool._launching == 0
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_launch_does_not_block_leases_of_healthy_browsers():
+    async def scenario():
+        playwright = FakePlaywright()
+        pool = await started_pool(playwright, size=2, max_uses=1000)
+        playwright.launch_seconds = 1
+        pool._browsers[0].browser.connected = False
+        # Takes the slot of the dead browser and launches its replacement
+        pool.health_interval = 0
+        health = asyncio.create_task(pool._health_loop())
+        await asyncio.sleep(0.01)
+        assert pool._launching == 1
+        pooled = await asyncio.wait_for(pool._acquire(), timeout=0.1)
+        assert pooled is pool._browsers[0]
+        await pool._release(pooled)
+        health.cancel()
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_waiting_lease_fails_when_pool_stops():
+    async def scenario():
+        playwright = FakePlaywright()
+        pool = await started_pool(playwright, size=1, max_uses=1)
+        held = await pool._acquire()
+        waiting = asyncio.create_task(pool._acquire())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await pool.stop()
+        try:
+            await waiting
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("lease should fail once the pool stops")
+        await pool._release(held)
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+
+class ProfileCollection:
+    def __init__(self):
+        self.deleted = []
+
+    async def delete_one(self, filter):
+        self.deleted.append(filter)
+
+
+def test_delete_search_removes_the_job_profile(server, monkeypatch):
+    deleted_jobs = []
+
+    async def get_status(job_id):
+        return {"status": "completed", "progress": {}}
+
+    async def get_result(job_id):
+        return None
+
+    async def delete_job(job_id):
+        deleted_jobs.append(job_id)
+        return {"input": {}}
+
+    monkeypatch.setattr(server.search_store, "get_status", get_status)
+    monkeypatch.setattr(server.search_store, "get_result", get_result)
+    monkeypatch.setattr(server.search_store, "delete_job", delete_job)
+    profiles = ProfileCollection()
+    monkeypatch.setattr(server.job_profiler, "collection", profiles)
+
+    response = TestClient(server.app).delete("/api/search/job-1")
+    assert response.status_code == 200
+    assert deleted_jobs == ["job-1"]
+    assert profiles.deleted == [{"_id": "job-1"}]
@@ -0,0 +1,73 @@
+import asyncio
+import copy
+
+from benchmarks.bench_progress_round_trips import (
+    PHOTO_TICKS, STANDARD_TICKS, legacy_update_progress, new_job
+)
+from utils.metrics import job_round_trips
+from utils.search_store import SearchStore
+
+
+class RecordingCollection:
+    """One-job stand-in for a Motor collection that records every command sent"""
+
+    def __init__(self, job):
+        self.job = job
+        self.commands = []
+
+    async def find_one(self, filter, projection=None):
+        self.commands.append("find")
+        return copy.deepcopy(self.job)
+
+    async def update_one(self, filter, update):
+        self.commands.append("update")
+        self.job.update(copy.deepcopy(update["$set"]))
+
+    async def find_one_and_update(self, filter, update, **kwargs):
+        self.commands.append("findAndModify")
+        return {"status": self.job["status"], "progress": self.job["progress"]}
+
+
+class RecordingDb:
+    def __init__(self, job):
+        self.searches = RecordingCollection(job)
+        self.search_results = RecordingCollection({})
+
+
+def legacy_trips(ticks):
+    job = new_job(0)
+    collection = RecordingCollection(job)
+
+    async def replay():
+        for stage, progress in ticks:
+            await legacy_update_progress(collection, job["id"], stage, progress)
+
+    asyncio.run(replay())
+    return collection.commands
+
+
+def atomic_trips(ticks):
+    job = new_job(0)
+    store = SearchStore(RecordingDb(job))
+
+    async def replay():
+        with job_round_trips() as trips:
+            for stage, progress in ticks:
+                await store.update_progress(job["id"], stage, progress)
+        return trips[0]
+
+    counted = asyncio.run(replay())
+    return store.jobs.commands, counted
+
+
+def test_legacy_progress_reads_and_writes_per_tick():
+    assert len(legacy_trips(STANDARD_TICKS)) == 20
+    assert len(legacy_trips(PHOTO_TICKS)) == 28
+
+
+def test_progress_update_is_one_round_trip_per_tick():
+    for ticks, expected in ((STANDARD_TICKS, 10), (PHOTO_TICKS, 14)):
+        commands, counted = atomic_trips(ticks)
+        assert commands == ["findAndModify"] * expected
+        # The per-job counter behind past_matters_job_mongo_round_trips agrees with the commands sent
+        assert counted == expected
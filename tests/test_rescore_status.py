@@ -0,0 +1,32 @@
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+
+def test_rescore_status_of_a_run_in_progress(server, monkeypatch):
+    last_id = ObjectId()
+    checkpoint = {
+        "_id": "run-1",
+        "phase": "search_results",
+        "last_id": last_id,
+        "processed": 500,
+        "updated": 12,
+        "completed": False,
+        "started_at": "2026-01-01T00:00:00+00:00",
+        "docs_per_sec": 250.0
+    }
+
+    async def get_checkpoint(run_id):
+        return dict(checkpoint) if run_id == checkpoint["_id"] else None
+
+    monkeypatch.setattr(server.result_rescorer, "get_checkpoint", get_checkpoint)
+    client = TestClient(server.app)
+
+    response = client.get("/api/admin/rescore/run-1", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["run_id"] == "run-1"
+    assert body["last_id"] == str(last_id)
+    assert body["processed"] == 500
+    assert body["running"] is False
+
+    assert client.get("/api/admin/rescore/other", headers={"X-Admin-Token": "secret"}).status_code == 404
@@ -0,0 +1,55 @@
+from benchmarks.synthetic import make_court_cases, make_profiles
+from utils.risk_calculator import RiskCalculator
+from utils.risk_rules import NO_FACTORS, RuleEngine
+
+
+def synthetic_subjects(count):
+    return [
+        (make_court_cases(seed % 9, seed=seed), make_profiles(seed * 5 % 13, seed=seed, max_changes=6))
+        for seed in range(count)
+    ]
+
+
+def test_scorer_matches_the_rule_tables():
+    calculator, timed = RiskCalculator(), RiskCalculator(rule_timing=True)
+    for cases, profiles in synthetic_subjects(200):
+        assert calculator.calculate_risk(cases, profiles) == timed.calculate_risk(cases, profiles)
+
+
+def test_scorer_matches_the_rule_tables_on_sparse_records():
+    calculator, engine = RiskCalculator(), RuleEngine()
+    cases = make_court_cases(4, seed=1)
+    cases[0]["severity_score"] = 2.5
+    del cases[1]["status"]
+    del cases[2]["severity_score"]
+    del cases[3]["case_type"]
+    profiles = make_profiles(3, seed=1)
+    del profiles[0]["relationship_status_history"]
+    del profiles[1]["activity_pattern"]
+    for subject in (([], []), (cases, []), ([], profiles), (cases, profiles), ([{}], [])):
+        scores, factors, _ = engine.evaluate(*subject)
+        assert calculator._score(*subject) == (*scores, factors)
+
+
+def test_rule_stats_only_with_rule_timing():
+    cases, profiles = synthetic_subjects(10)[8]
+    calculator = RiskCalculator(rule_timing=True)
+    calculator.calculate_risk(cases, profiles)
+    stats = calculator.rule_stats()
+    assert stats["case.case_severity"]["calls"] == len(cases)
+    assert stats["profile.matrimonial_profiles"]["calls"] == len(profiles)
+    assert RiskCalculator().rule_stats() == {}
+
+
+def test_incomplete_sources_are_reported():
+    calculator = RiskCalculator()
+    risk = calculator.calculate_risk([], [], ["court_cases"])
+    assert risk["incomplete_sources"] == ["court_cases"]
+    assert risk["contributing_factors"] == ["Incomplete search: court cases timed out, risk may be understated"]
+
+    cases = make_court_cases(3, seed=2)
+    [risk] = calculator.calculate_risk_batch([(cases, [], ["court_cases", "social_media"])])
+    assert risk["contributing_factors"][0].startswith("Incomplete search: court cases, social media")
+    factors = calculator.calculate_risk(cases, [])["contributing_factors"]
+    assert risk["contributing_factors"][1:] == [factor for factor in factors if factor != NO_FACTORS]
+    assert "incomplete_sources" not in calculator.calculate_risk(cases, [])